@@ -91,4 +91,58 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Version tokens every worker process must agree on (trades.resolver's
+    # name index, trades.chart_cache's per-user chart data versions).  File based so all processes on this host share them; with
+    # several hosts point it at memcached/redis instead.  A lost token only
+    # costs a rebuild.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'versions'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Rendered chart images (trades.chart_cache), keyed by the shared data
+    # versions above, so a per-process LocMem never serves stale images.  To
+    # share the rendered bytes between workers too use a FileBasedCache, e.g.
+    #   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #   'LOCATION': os.path.join(BASE_DIR, 'chart_cache'),
+    'charts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trades-charts',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+
+
 
+# --- Trades app tuning ---
+# Rows per bulk UPDATE when the FIFO engine writes recalculated profits.
+FIFO_WRITE_BATCH_SIZE = 1000
+# Recalculate FIFO profits after edits/deletes/back-dated trades in a background
+# thread (see trades.fifo.request_fifo_recalc) instead of inside the request.
+# Where that thread can't be relied on (uWSGI without --enable-threads, workers
+# recycled often) also run `manage.py process_fifo_queue --loop`, or set False
+# to recalculate synchronously.
+FIFO_RECALC_ASYNC = True
+# Seconds the background worker waits so bursts of edits coalesce into one run.
+FIFO_RECALC_DELAY = 0.5
+# Seconds between the background worker's polls for leftover requests.
+FIFO_RECALC_POLL_INTERVAL = 30
+# Rows per page of the index page's transaction table (more load on scroll).
+TRANSACTIONS_PAGE_SIZE = 50
+# Byte cap of each worker's in-memory LRU of rendered charts, in front of the
+# 'charts' cache.
+CHART_CACHE_LOCAL_BYTES = 16 * 1024 * 1024
+# Pre-render the item and global profit charts in a background thread pool
+# after a FIFO recalculation, so the redirected index page hits the cache
+# (see trades.chart_warmup).
+CHART_WARMUP = True
+CHART_WARMUP_WORKERS = 2
+CHART_WARMUP_TIMEFRAMES = ['Daily']
+CHART_WARMUP_FORMATS = ['webp']
+CHART_WARMUP_MAX_ITEMS = 3
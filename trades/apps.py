@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trades'
+
+    def ready(self):
+        # Connect the signal handlers that keep the name index, the chart
+        # cache versions and the numeric wealth points current.
+        from . import chart_cache, resolver, wealth  # noqa: F401
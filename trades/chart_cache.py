@@ -0,0 +1,199 @@
+# trades/chart_cache.py
+
+"""
+Cache of rendered chart images.
+
+A chart is keyed by (kind, user, item, query parameters, data version).
+The data version is a token per user and data set ('transactions' or
+'wealth'), replaced whenever one of that user's rows changes, so a stale
+image is simply never looked up again and ages out.  The tokens live in the
+'versions' cache alias, shared by every process (web workers, the FIFO
+queue command, recalculation pool children), so a bump anywhere retires
+the images everywhere.
+
+Images live in two tiers:
+
+- an in-process LRU capped at settings.CHART_CACHE_LOCAL_BYTES, and
+- the 'charts' cache alias (settings.CACHES), which can be a FileBasedCache
+  or memcached so that every worker shares rendered bytes.
+
+Transaction/WealthData signals bump the versions.  Writes that bypass
+signals (the FIFO engine's bulk profit updates) call bump_data_version().
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from . import chart_formats, resolver
+from .models import Transaction, WealthData
+
+CACHE_ALIAS = 'charts'
+VERSION_CACHE = 'versions'
+
+
+class LocalLRU:
+    """Byte-capped least-recently-used dict of rendered images, with hit/miss counters."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.counters['evictions'] += 1
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+local = LocalLRU(getattr(settings, 'CHART_CACHE_LOCAL_BYTES', 16 * 1024 * 1024))
+
+
+def _version_key(scope, owner):
+    return f'trades:chart_version:{scope}:{owner}'
+
+
+def data_version(scope, owner):
+    """Current version token of ``owner``'s ``scope`` data (user id or username)."""
+    cache = caches[VERSION_CACHE]
+    key = _version_key(scope, owner)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(scope, owner):
+    """
+    Retire every cached chart of ``owner``'s ``scope`` data.  Bumped again
+    on commit: a chart rendered from the old rows while the transaction was
+    open must not survive under the intermediate version.
+    """
+    def bump():
+        caches[VERSION_CACHE].set(_version_key(scope, owner), uuid.uuid4().hex, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_chart(key):
+    png = local.get(key)
+    if png is not None:
+        local.count('local_hits')
+        return png
+    png = caches[CACHE_ALIAS].get(key)
+    if png is not None:
+        local.count('shared_hits')
+        local.set(key, png)
+        return png
+    local.count('misses')
+    return None
+
+
+def store_chart(key, png):
+    local.set(key, png)
+    caches[CACHE_ALIAS].set(key, png)
+
+
+def stats():
+    """This process's counters plus the local tier's size, for monitoring."""
+    with local.lock:
+        return dict(local.counters, local_entries=len(local.entries), local_bytes=local.size)
+
+
+def chart_key(kind, request, scope):
+    """
+    Cache key for ``request`` to chart ``kind``, or None if it must not be
+    cached (the search names no known item).
+    """
+    user = request.user
+    item_id = ''
+    search = request.GET.get('search')
+    if search is not None:
+        _, item = resolver.resolve(search)
+        if item is None:
+            return None
+        item_id = item.pk
+    owner = user.username if scope == 'wealth' else user.pk
+    params = '&'.join(
+        f'{name}={request.GET[name]}' for name in sorted(request.GET) if name != 'search'
+    )
+    # The format can come from the Accept header rather than the query string.
+    image_format = chart_formats.negotiate(request)
+    # Hashed: query strings may hold characters memcached keys cannot.
+    digest = hashlib.sha1(
+        f'{item_id}:{params}:{image_format}:{data_version(scope, owner)}'.encode()
+    ).hexdigest()
+    return f'trades:chart:{kind}:{user.pk}:{digest}'
+
+
+def cached_chart(kind, scope='transactions'):
+    """View decorator serving a chart image view from the chart cache."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = chart_key(kind, request, scope)
+            image = get_chart(key) if key else None
+            if image is not None:
+                response = HttpResponse(image, content_type=chart_formats.FORMATS[chart_formats.negotiate(request)])
+                response['X-Chart-Cache'] = 'hit'
+            else:
+                response = view(request, *args, **kwargs)
+                if key and response.status_code == 200:
+                    store_chart(key, response.content)
+                response['X-Chart-Cache'] = 'miss'
+            patch_vary_headers(response, ['Accept'])
+            return response
+        return wrapper
+    return decorator
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def _transaction_changed(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        bump_data_version('transactions', instance.user_id)
+
+
+@receiver(post_save, sender=WealthData)
+@receiver(post_delete, sender=WealthData)
+def _wealth_changed(sender, instance, **kwargs):
+    bump_data_version('wealth', instance.account_name)
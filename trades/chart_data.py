@@ -0,0 +1,187 @@
+# trades/chart_data.py
+
+"""
+Data preparation for the charts, shared by the PNG views and the JSON
+endpoints.
+
+The trade series read the DailyRollup table, so their cost grows with the
+number of days traded, not the number of trades.
+
+Each function returns a Series -- a DatetimeIndex plus named value columns
+of the same length -- or None when there is nothing to chart.  The PNG views
+plot the index on a date axis; the JSON endpoints send it as ISO dates.
+downsample() reduces long series to about one point per pixel first.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from django.db.models import Sum
+
+from . import wealth
+from .models import DailyRollup
+
+Series = namedtuple('Series', ['dates', 'columns'])
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+
+# Resample frequency (bucket start) per timeframe.
+BUCKETS = {'Monthly': 'MS', 'Yearly': 'YS', 'Daily': 'D'}
+
+def to_json(series):
+    """Columnar dict of ``series``: ISO dates plus one list per column (NaN -> null)."""
+    if series is None:
+        return {'dates': [], 'series': {}}
+    return {
+        'dates': [d.strftime('%Y-%m-%d') for d in series.dates],
+        'series': {
+            name: [None if np.isnan(v) else v for v in np.asarray(values, dtype=float).tolist()]
+            for name, values in series.columns.items()
+        },
+    }
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Positions of the points Largest-Triangle-Three-Buckets keeps when
+    reducing (x, y) to ``max_points`` points.  The first and last points
+    always stay; the rest are split into max_points - 2 buckets, each keeping
+    the point that forms the largest triangle with the point kept before it
+    and the average of the next bucket.  Peaks and dips survive, unlike
+    with plain striding.
+    """
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Average point of each bucket, plus the last point as the one after the last bucket
+    counts = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / counts
+    mean_y = np.add.reduceat(y, edges) / counts
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample(series, max_points):
+    """
+    ``series`` with only the rows LTTB keeps for any of its columns, so at
+    most ``max_points`` per column.  Columns are reduced separately (NaNs
+    left out) and share the union of their rows.  Shorter series are
+    returned as they are.
+    """
+    if series is None or not max_points or len(series.dates) <= max_points:
+        return series
+    x = series.dates.asi8.astype(float)
+    keep = np.array([], dtype=np.int64)
+    for values in series.columns.values():
+        y = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(y))
+        keep = np.union1d(keep, valid[lttb_indices(x[valid], y[valid], max_points)])
+    return Series(series.dates[keep], {name: np.asarray(values)[keep] for name, values in series.columns.items()})
+
+
+def _frame(queryset, *fields):
+    """
+    DataFrame of ``fields`` for ``queryset``'s DailyRollup rows, indexed by
+    day, read with a single values_list() straight into NumPy columns.
+    """
+    rows = list(queryset.order_by('day').values_list('day', *fields))
+    if not rows:
+        return None
+    columns = list(zip(*rows))
+    dates = pd.DatetimeIndex(np.array(columns[0], dtype='datetime64[D]'))
+    return pd.DataFrame({name: np.array(values, dtype=float) for name, values in zip(fields, columns[1:])},
+                        index=dates)
+
+
+def global_profit_series(user, timeframe):
+    """
+    The user's global realized (cumulative) profit, resampled by timeframe
+    (Daily/Monthly/Yearly) and forward-filled so the line has no zero dips.
+    """
+    daily = DailyRollup.objects.filter(user=user).values('day').annotate(profit=Sum('realised_profit'))
+    df = _frame(daily, 'profit')
+    if df is None:
+        return None
+    # Running total at the end of each day, last value per bucket, carried over empty buckets
+    profit = df['profit'].cumsum().resample(BUCKETS.get(timeframe, 'D')).last().ffill()
+    return Series(profit.index, {'cumulative_profit': profit.to_numpy()})
+
+
+def _item_rollups(user, item, *fields):
+    return _frame(DailyRollup.objects.filter(user=user, item=item), *fields)
+
+
+def _price_columns(df, timeframe):
+    sums = df.resample(BUCKETS.get(timeframe, 'D')).sum()
+    columns = {}
+    for side in ('buy', 'sell'):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price = sums[f'{side}_notional'].to_numpy() / sums[f'{side}_qty'].to_numpy()
+        # Empty buckets (and zero prices) carry the previous price forward
+        price[(sums[f'{side}_qty'].to_numpy() == 0) | (price == 0)] = np.nan
+        columns[f'{side}_price'] = pd.Series(price).ffill().to_numpy()
+    return Series(sums.index, columns)
+
+
+def _profit_columns(df, timeframe):
+    profit = df['realised_profit'].resample(BUCKETS.get(timeframe, 'D')).sum().cumsum()
+    return Series(profit.index, {'cumulative_profit': profit.to_numpy()})
+
+
+def item_price_series(user, item, timeframe):
+    """
+    Quantity-weighted average buy and sell prices of ``item`` per timeframe
+    bucket, sum(price * qty) / sum(qty), forward-filled over buckets without
+    trades so the lines stay continuous.
+    """
+    df = _item_rollups(user, item, 'buy_notional', 'buy_qty', 'sell_notional', 'sell_qty')
+    return None if df is None else _price_columns(df, timeframe)
+
+
+def item_profit_series(user, item, timeframe):
+    """
+    Cumulative realized profit of ``item``: realized profits summed per
+    timeframe bucket, then accumulated (empty buckets keep the last total).
+    """
+    df = _item_rollups(user, item, 'realised_profit')
+    return None if df is None else _profit_columns(df, timeframe)
+
+
+def item_dashboard_series(user, item, timeframe):
+    """
+    item_price_series() and item_profit_series() from a single query: one
+    Series with buy_price, sell_price and cumulative_profit columns.
+    """
+    df = _item_rollups(user, item, 'buy_notional', 'buy_qty', 'sell_notional', 'sell_qty', 'realised_profit')
+    if df is None:
+        return None
+    prices = _price_columns(df, timeframe)
+    # Same rows, same buckets: both share the index
+    return Series(prices.dates, dict(prices.columns, **_profit_columns(df, timeframe).columns))
+
+
+def wealth_series(account_name):
+    """
+    Total wealth per month across all years of ``account_name``'s WealthData
+    rows (summed over accounts), leaving out months that total zero.
+    """
+    totals = wealth.monthly_totals(account_name)
+    # Sorted by (year, month), leaving out zero months
+    keys = [key for key in sorted(totals) if totals[key] != 0]
+    if not keys:
+        return None
+    dates = pd.to_datetime([f"{year}-{month:02d}-01" for year, month in keys])
+    return Series(dates, {'total_wealth': np.array([float(totals[key]) for key in keys])})
@@ -0,0 +1,76 @@
+# trades/chart_formats.py
+
+"""
+Output format and size of chart images, from the query string and the
+Accept header.
+
+?format=png|webp|svg picks the format.  Without it the Accept header is
+negotiated: the format it rates highest among the ones listed by name (WebP
+first on a tie, then PNG, then SVG), or PNG for wildcard-only headers.
+?w= and ?h= give the size in pixels and ?dpi= the resolution, which scales
+text and lines; each is clamped to LIMITS.  A chart keeps its aspect ratio
+when only ?w= is given.
+
+Kept free of matplotlib so that the chart cache can key on the format
+without loading the chart stack.
+"""
+
+from collections import namedtuple
+
+FORMATS = {'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+
+# Tie-break order when the Accept header rates several formats the same.
+PREFERENCE = ['webp', 'png', 'svg']
+
+# (lowest, highest) accepted value per query parameter.
+LIMITS = {'w': (200, 2400), 'h': (150, 1600), 'dpi': (50, 300)}
+
+DEFAULT_DPI = 100
+
+ImageSpec = namedtuple('ImageSpec', ['format', 'figsize', 'dpi'])
+
+
+def _accept_qualities(accept):
+    """{media type: q} of an Accept header."""
+    qualities = {}
+    for part in accept.split(','):
+        media_type, *params = [piece.strip() for piece in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            qualities[media_type.lower()] = quality
+    return qualities
+
+
+def negotiate(request):
+    """The image format to answer ``request`` with (a FORMATS key)."""
+    requested = request.GET.get('format', '').lower()
+    if requested in FORMATS:
+        return requested
+    qualities = _accept_qualities(request.META.get('HTTP_ACCEPT', ''))
+    best = max(PREFERENCE, key=lambda name: qualities.get(FORMATS[name], 0))
+    return best if qualities.get(FORMATS[best], 0) > 0 else 'png'
+
+
+def _clamped(request, name, default):
+    try:
+        value = int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+    low, high = LIMITS[name]
+    return min(max(value, low), high)
+
+
+def image_spec(request, figsize):
+    """ImageSpec for ``request`` of a chart laid out at ``figsize`` inches by default."""
+    dpi = _clamped(request, 'dpi', DEFAULT_DPI)
+    default_width = round(figsize[0] * DEFAULT_DPI)
+    width = _clamped(request, 'w', default_width)
+    height = _clamped(request, 'h', round(figsize[1] * DEFAULT_DPI * width / default_width))
+    return ImageSpec(negotiate(request), (width / dpi, height / dpi), dpi)
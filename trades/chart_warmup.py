@@ -0,0 +1,113 @@
+# trades/chart_warmup.py
+
+"""
+Pre-rendering of charts into the chart cache after a FIFO recalculation.
+
+Saving a trade redirects to the index page for its item, which at once
+requests the item's dashboard chart (price and profit panels).  With
+settings.CHART_WARMUP the FIFO engine hands the user and the changed items
+to warm_charts() and those charts, plus the global profit chart, are
+rendered by a small thread
+pool as soon as the recalculation commits, so the page's image requests are
+usually cache hits.
+
+Renders go through the chart views themselves (with a synthetic GET
+request), so they are stored under exactly the keys the browser's requests
+look up.  Charts already in the cache are not rendered again.
+
+Settings:
+
+- CHART_WARMUP: enable the warm-up (default False).
+- CHART_WARMUP_WORKERS: pool threads (default 2), each rendering one chart
+  at a time; 0 renders in the committing thread instead.
+- CHART_WARMUP_TIMEFRAMES: timeframes to render (default ['Daily'], the
+  index page's default).
+- CHART_WARMUP_FORMATS: image formats to render (default ['webp'], which
+  every current browser lists in the Accept header of image requests).
+- CHART_WARMUP_MAX_ITEMS: at most this many item dashboards per
+  recalculation (default 3); bulk recalculations touch far more items than
+  anyone is about to look at.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.http import HttpRequest, QueryDict
+
+from . import chart_formats
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chart-warmup')
+        return _pool
+
+
+def chart_requests(item_names, timeframes):
+    """(view name, GET params) of every chart to pre-render."""
+    for timeframe in timeframes:
+        yield 'global_profit_chart', {'timeframe': timeframe}
+        for name in item_names:
+            yield 'item_dashboard_chart', {'search': name, 'timeframe': timeframe}
+
+
+def render_chart(user, view_name, params, image_format='png'):
+    """
+    Render one chart view for ``user`` into the chart cache, as a browser
+    accepting ``image_format`` would request it.  Returns its X-Chart-Cache status.
+    """
+    from . import views
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.user = user
+    request.GET = QueryDict(mutable=True)
+    request.GET.update(params)
+    request.META['HTTP_ACCEPT'] = chart_formats.FORMATS[image_format]
+    return getattr(views, view_name)(request)['X-Chart-Cache']
+
+
+def _render_in_pool(user, view_name, params, image_format):
+    try:
+        render_chart(user, view_name, params, image_format)
+    except Exception:
+        logger.exception("Chart warm-up of %s %s for user %s failed", view_name, params, user.pk)
+    finally:
+        # Pool threads have their own connections; release them like a request would.
+        close_old_connections()
+
+
+def warm_charts(user, item_ids):
+    """
+    Once the current transaction commits, pre-render ``user``'s global
+    profit chart and the charts of the items ``item_ids`` (up to
+    CHART_WARMUP_MAX_ITEMS of them).  Does nothing unless CHART_WARMUP is set.
+    """
+    if not getattr(settings, 'CHART_WARMUP', False):
+        return
+    item_ids = sorted(item_ids)[:getattr(settings, 'CHART_WARMUP_MAX_ITEMS', 3)]
+    timeframes = getattr(settings, 'CHART_WARMUP_TIMEFRAMES', ['Daily'])
+    image_formats = getattr(settings, 'CHART_WARMUP_FORMATS', ['webp'])
+    workers = getattr(settings, 'CHART_WARMUP_WORKERS', 2)
+
+    def submit():
+        names = list(Item.objects.filter(id__in=item_ids).values_list('name', flat=True))
+        for view_name, params in chart_requests(names, timeframes):
+            for image_format in image_formats:
+                if workers > 0:
+                    _get_pool(workers).submit(_render_in_pool, user, view_name, params, image_format)
+                else:
+                    render_chart(user, view_name, params, image_format)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,145 @@
+# trades/charts.py
+
+"""
+Chart rendering for the chart views, as palette PNG, WebP or SVG.
+
+Every render builds its own matplotlib Figure on a FigureCanvasAgg and never
+touches pyplot, whose global "current figure" state is shared between
+threads.  Figures are independent objects (and matplotlib keeps its font
+objects per thread), so concurrent renders are safe under a threaded WSGI
+server.
+
+Raster output is quantised to a palette before encoding: the charts are a
+few flat colours plus antialiasing, so this barely shows, and PNGs come out
+about a third the size of matplotlib's RGBA ones and faster to encode.
+"""
+
+import io
+from functools import lru_cache
+
+import matplotlib
+import numpy as np
+from PIL import Image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator, StrMethodFormatter
+
+from .chart_formats import DEFAULT_DPI as DPI
+
+# SVG text as <text> elements rather than glyph outlines: smaller files.
+matplotlib.rcParams['svg.fonttype'] = 'none'
+
+# matplotlib's default figure size, used by the placeholder images.
+DEFAULT_FIGSIZE = (6.4, 4.8)
+
+# Raster encoding: palette size and Pillow's WebP options (lossless, quick).
+PALETTE_COLORS = 256
+WEBP_OPTIONS = {'lossless': True, 'method': 2, 'quality': 0}
+
+# Thousands separators, no decimals: the prices and profits are in GP.
+AMOUNT_FORMAT = '{x:,.0f}'
+
+
+def new_figure(figsize=DEFAULT_FIGSIZE, dpi=DPI):
+    """A (figure, axes) pair on its own Agg canvas."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def save(fig, fmt='png', out=None):
+    """
+    Encode ``fig`` as ``fmt`` ('png', 'webp' or 'svg') into the file-like
+    ``out`` (an HttpResponse will do) and return ``out``.  Without ``out``
+    the encoded bytes are returned.
+    """
+    target = io.BytesIO() if out is None else out
+    if fmt == 'svg':
+        # The SVG backend only writes to seekable files, which responses aren't.
+        buf = io.BytesIO()
+        fig.savefig(buf, format='svg')
+        target.write(buf.getbuffer())
+    else:
+        fig.canvas.draw()
+        image = Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba(),
+                                 'raw', 'RGBA', 0, 1)
+        image = image.convert('RGB').quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        if fmt == 'webp':
+            image.save(target, 'WEBP', **WEBP_OPTIONS)
+        else:
+            image.save(target, 'PNG')
+    return target.getvalue() if out is None else out
+
+
+def render(fig, fmt='png', out=None):
+    """Lay out ``fig`` and encode it, see save()."""
+    fig.tight_layout()
+    return save(fig, fmt, out)
+
+
+def pixel_width(figsize, dpi=DPI):
+    """Width in pixels of a chart of ``figsize``: more points than this can't be told apart."""
+    return int(figsize[0] * dpi)
+
+
+@lru_cache(maxsize=64)
+def placeholder(message, fmt='png'):
+    """A chart-sized image with just ``message`` in the middle ("no data" and friends)."""
+    fig, ax = new_figure()
+    ax.text(0.5, 0.5, message, ha='center', va='center')
+    return save(fig, fmt)
+
+
+def _draw_lines(ax, x, series, title, xlabel, ylabel, max_xticks, align_xticks, legend):
+    for y, color, label in series:
+        ax.plot(x, y, color=color, linewidth=1, marker='', label=label)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.yaxis.set_major_formatter(StrMethodFormatter(AMOUNT_FORMAT))
+    if np.issubdtype(x.dtype, np.datetime64):
+        locator = AutoDateLocator(maxticks=max_xticks) if max_xticks else AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+    else:
+        if max_xticks:
+            ax.xaxis.set_major_locator(MaxNLocator(max_xticks))
+        for tick_label in ax.get_xticklabels():
+            tick_label.set_rotation(45)
+            tick_label.set_horizontalalignment(align_xticks)
+    if legend:
+        ax.legend()
+
+
+def line_chart(x, series, title='', xlabel='', ylabel='', figsize=(10, 4), max_xticks=None,
+               align_xticks='center', legend=False, dpi=DPI, fmt='png', out=None):
+    """
+    Line chart of one or more ``series`` against the shared ``x`` values,
+    encoded by render() (PNG bytes by default).
+
+    Each series is a (y_values, color, label) tuple, drawn as a thin line
+    without markers.  The y axis is formatted as an amount.  Dates (a
+    DatetimeIndex or datetime64 array) get a real date axis with concise
+    automatic ticks; other x values are labels, rotated 45 degrees and
+    aligned by ``align_xticks``.  ``max_xticks`` thins the x ticks either way.
+    Long date series should be reduced first (chart_data.downsample()).
+    """
+    fig, ax = new_figure(figsize, dpi)
+    _draw_lines(ax, np.asarray(x), series, title, xlabel, ylabel, max_xticks, align_xticks, legend)
+    return render(fig, fmt, out)
+
+
+def stacked_chart(x, panels, figsize=(10, 7), max_xticks=None, dpi=DPI, fmt='png', out=None):
+    """
+    Several line charts stacked in one image, sharing the ``x`` axis.
+    ``panels`` holds (series, title, ylabel) tuples, top to bottom, with
+    series as in line_chart(); each panel gets a legend.
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    x = np.asarray(x)
+    axes = fig.subplots(len(panels), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, (series, title, ylabel) in zip(axes, panels):
+        _draw_lines(ax, x, series, title, '', ylabel, max_xticks, 'right', True)
+    return render(fig, fmt, out)
@@ -0,0 +1,613 @@
+# trades/fifo.py
+
+"""
+The FIFO profit engine: matching sells against the oldest open buy lots,
+replaying a user's history, the OpenLot ledger, the Position/UserTradeTotals/
+DailyRollup summaries and the queued background recalculations.
+
+Kept out of views.py and free of heavy imports, so management commands and
+worker boot don't pay for the chart stack.  NumPy (for fifo_kernel) is only
+imported when a history is actually replayed.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import chart_cache, chart_warmup
+from .models import DailyRollup, FifoRecalcRequest, OpenLot, Position, Transaction, UserTradeTotals
+
+logger = logging.getLogger(__name__)
+
+# Sell proceeds are reduced by a 2% fee.
+FEE_FACTOR = 0.98
+
+def fifo_position(trans):
+    """
+    Position of a transaction in the FIFO replay order:
+    (date_of_holding, trans_type, id).  Used as the ``since`` argument of
+    calculate_fifo_for_user().
+    """
+    return (trans.date_of_holding, trans.trans_type, trans.id)
+
+
+def _fifo_before(position):
+    """Q() matching the transactions that sort strictly before ``position``."""
+    date_of_holding, trans_type, trans_id = position
+    return (
+        Q(date_of_holding__lt=date_of_holding)
+        | Q(date_of_holding=date_of_holding, trans_type__lt=trans_type)
+        | Q(date_of_holding=date_of_holding, trans_type=trans_type, id__lt=trans_id)
+    )
+
+
+def _fifo_match(purchase_lots, item_id, trans_type, quantity, price, trans_id=None, date_of_holding=None):
+    """
+    Apply one transaction to the open purchase lots and return its realised profit.
+    Buys open a new lot ([qty, price, trans_id, date_of_holding]);
+    sells consume the oldest lots first.
+
+    Row-by-row counterpart of fifo_kernel(), used where only one trade is
+    matched against the ledger.
+    """
+    lots = purchase_lots.setdefault(item_id, deque())
+    if trans_type == 'Buy':
+        lots.append([quantity, price, trans_id, date_of_holding])
+        return 0.0
+    qty_to_sell = quantity
+    profit = 0.0
+    while qty_to_sell > 0 and lots:
+        lot = lots[0]
+        used = min(qty_to_sell, lot[0])
+        # Example includes 2% fee
+        partial_profit = (price * used * FEE_FACTOR) - (lot[1] * used)
+        profit += partial_profit
+        lot[0] -= used
+        qty_to_sell -= used
+        if lot[0] <= 0:
+            lots.popleft()
+    return profit
+
+
+def calculate_fifo_for_user(user, since=None, batch_size=None, warm_charts=True):
+    """
+    FIFO logic for *one* user.
+    The user's history is read with a single values_list() query and
+    matched in memory by fifo_kernel(), which replaces the old per-row loop.
+
+    Without ``since`` every transaction is checked for changes.  With ``since``
+    (a fifo_position() tuple, i.e. the earliest position touched by an
+    add/edit/delete) the earlier rows only feed the lot state and running
+    total; just the rows from that position onwards are compared and written.
+    The numbers come from the same computation either way, so the result is
+    identical to a full replay.
+
+    The OpenLot ledger is then made to match the lots left open at the end,
+    and the user's Position/UserTradeTotals summaries and DailyRollup rows
+    (from the day of ``since``) are refreshed.  New trades appended after the rest of the history don't need a replay at
+    all, see calculate_fifo_for_new_trade().
+
+    Only realised_profit/cumulative_profit are written, only for rows whose
+    values changed, in chunks of ``batch_size`` rows (default
+    settings.FIFO_WRITE_BATCH_SIZE), see _write_profits().  Returns the number of rows written.
+
+    If anything changed and ``warm_charts`` is set, the global profit chart
+    and the charts of the items whose rollups changed are queued for
+    pre-rendering (chart_warmup.warm_charts(), a no-op unless enabled).
+
+    Wrapped in a single atomic block to reduce database locking.
+    """
+    import numpy as np
+    from .fifo_kernel import fifo_kernel
+
+    if batch_size is None:
+        batch_size = getattr(settings, 'FIFO_WRITE_BATCH_SIZE', 1000)
+    with transaction.atomic():
+        rows = list(
+            Transaction.objects.filter(user=user)
+            .order_by('date_of_holding', 'trans_type', 'id')
+            .values_list('id', 'item_id', 'trans_type', 'quantity', 'price', 'date_of_holding',
+                         'realised_profit', 'cumulative_profit')
+        )
+        ids, item_ids, trans_types, quantities, prices, dates, stored_realised, stored_cumulative = (
+            zip(*rows) if rows else ([],) * 8
+        )
+        result = fifo_kernel(
+            np.array(item_ids, dtype=np.int64),
+            np.array([trans_type != 'Buy' for trans_type in trans_types], dtype=bool),
+            np.array(quantities, dtype=np.float64),
+            np.array(prices, dtype=np.float64),
+        )
+        realised = result.realised.tolist()
+        cumulative = result.cumulative.tolist()
+        remaining = result.remaining.tolist()
+
+        start = 0
+        if since is not None:
+            start = bisect_left(list(zip(dates, trans_types, ids)), since)
+        changed = [
+            (ids[i], realised[i], cumulative[i])
+            for i in range(start, len(rows))
+            if stored_realised[i] != realised[i] or stored_cumulative[i] != cumulative[i]
+        ]
+        _write_profits(changed, batch_size)
+
+        purchase_lots = {}  # {item_id: deque([[qty, price, trans_id, date_of_holding], ...])}
+        for i, qty in enumerate(remaining):
+            if qty > 0:
+                purchase_lots.setdefault(item_ids[i], deque()).append([qty, prices[i], ids[i], dates[i]])
+        _save_open_lots(user, purchase_lots, OpenLot.objects.filter(user=user), batch_size)
+
+        if user is not None:
+            per_item, totals = _summarise_trades(zip(item_ids, trans_types, quantities, prices, dates, realised))
+            _save_trade_summaries(user, per_item, totals, batch_size)
+            # Only days from ``since`` on can have changed.
+            since_day = since[0] if since is not None else None
+            first = bisect_left(dates, since_day) if since_day is not None else 0
+            rollups = _rollup_trades(zip(item_ids[first:], trans_types[first:], quantities[first:],
+                                         prices[first:], dates[first:], realised[first:]))
+            changed_items = _save_daily_rollups(user, rollups, since_day, batch_size)
+            # The charts read the rollups: a buy's new price changes no profit
+            # but still retires whatever was rendered before this replay.
+            if changed or changed_items:
+                chart_cache.bump_data_version('transactions', user.pk)
+            if warm_charts and (changed or changed_items):
+                chart_warmup.warm_charts(user, changed_items)
+        return len(changed)
+
+
+def calculate_fifo_for_new_trade(trans, batch_size=None):
+    """
+    Account for a freshly created transaction.
+    If it is the last one in its user's FIFO order it is matched straight
+    against the OpenLot ledger (no replay).  A back-dated trade, or one added
+    while an earlier recalculation is still pending (the ledger is stale
+    then), is handed to request_fifo_recalc() instead.
+    """
+    user = trans.user
+    position = fifo_position(trans)
+    with transaction.atomic():
+        user_trans = Transaction.objects.filter(user=user)
+        if (FifoRecalcRequest.objects.filter(user=user).exists()
+                or user_trans.exclude(id=trans.id).exclude(_fifo_before(position)).exists()):
+            request_fifo_recalc(user, since=position)
+            return 0
+
+        previous = (user_trans.filter(_fifo_before(position))
+                    .order_by('-date_of_holding', '-trans_type', '-id')
+                    .values_list('cumulative_profit', flat=True)
+                    .first())
+        ledger = OpenLot.objects.select_for_update().filter(user=user, item_id=trans.item_id)
+        purchase_lots = {trans.item_id: deque(_open_lot_rows(ledger))}
+        trans.realised_profit = _fifo_match(
+            purchase_lots, trans.item_id, trans.trans_type, trans.quantity, trans.price,
+            trans.id, trans.date_of_holding
+        )
+        trans.cumulative_profit = (previous or 0.0) + trans.realised_profit
+        Transaction.objects.filter(id=trans.id).update(
+            realised_profit=trans.realised_profit, cumulative_profit=trans.cumulative_profit
+        )
+        if user is not None:
+            chart_cache.bump_data_version('transactions', user.pk)
+        _save_open_lots(user, purchase_lots, ledger, batch_size)
+        if user is not None:
+            _add_trade_to_summaries(trans)
+            chart_warmup.warm_charts(user, [trans.item_id])
+        return 1
+
+
+def request_fifo_recalc(user, since=None):
+    """
+    Queue a FIFO recalculation of ``user`` from ``since`` (None = everything).
+    A pending request for the same user is merged with this one, keeping the
+    earliest position, so a burst of edits costs a single recalculation.
+
+    With settings.FIFO_RECALC_ASYNC the request is drained by a background
+    thread once the current transaction commits (or by the process_fifo_queue
+    command); otherwise it is processed before returning.  The thread only
+    starts with the first request a process queues, so requests left over
+    from a restart wait for it, and servers that don't run threads outside
+    requests (uWSGI without --enable-threads) never drain them: run
+    ``process_fifo_queue --loop`` there, or turn FIFO_RECALC_ASYNC off.
+    """
+    with transaction.atomic():
+        pending, created = FifoRecalcRequest.objects.select_for_update().get_or_create(user=user)
+        if created:
+            pending.since = since
+        elif pending.since is not None:
+            pending.since = None if since is None else min(pending.since, since)
+        pending.save()
+
+    if getattr(settings, 'FIFO_RECALC_ASYNC', False):
+        transaction.on_commit(_wake_fifo_worker)
+    else:
+        process_fifo_recalc_requests(user=user)
+
+
+def process_fifo_recalc_requests(user=None):
+    """
+    Run the pending FIFO recalculations (all of them, or just ``user``'s),
+    oldest first.  Each one is claimed and deleted inside the same atomic
+    block as its recalculation, so a failure leaves the request queued and
+    concurrent drainers skip rows that are already being processed.
+    Returns the number of recalculations that ran.
+    """
+    pending = FifoRecalcRequest.objects.order_by('requested_at')
+    if user is not None:
+        pending = pending.filter(user=user)
+    processed = 0
+    for request_id in list(pending.values_list('id', flat=True)):
+        try:
+            with transaction.atomic():
+                job = (FifoRecalcRequest.objects.select_for_update(skip_locked=True)
+                       .select_related('user').filter(id=request_id).first())
+                if job is None:
+                    continue
+                since = job.since
+                job.delete()
+                calculate_fifo_for_user(job.user, since=since)
+                processed += 1
+        except Exception:
+            logger.exception("FIFO recalculation request %s failed", request_id)
+    return processed
+
+
+_fifo_worker = None
+_fifo_worker_wakeup = threading.Event()
+_fifo_worker_lock = threading.Lock()
+
+
+def _wake_fifo_worker():
+    """Start the in-process FIFO worker thread if needed and tell it there is work."""
+    global _fifo_worker
+    with _fifo_worker_lock:
+        if _fifo_worker is None or not _fifo_worker.is_alive():
+            _fifo_worker = threading.Thread(target=_fifo_worker_loop, name='fifo-recalc', daemon=True)
+            _fifo_worker.start()
+    _fifo_worker_wakeup.set()
+
+
+def _fifo_worker_loop():
+    while True:
+        # Woken by new requests, but also polls: a request left by a failed run
+        # or by a process that died before draining it is retried on its own.
+        _fifo_worker_wakeup.wait(timeout=getattr(settings, 'FIFO_RECALC_POLL_INTERVAL', 30))
+        # Let a burst of edits pile up into the same request before draining.
+        time.sleep(getattr(settings, 'FIFO_RECALC_DELAY', 0.5))
+        _fifo_worker_wakeup.clear()
+        try:
+            process_fifo_recalc_requests()
+        except Exception:
+            logger.exception("FIFO recalculation worker failed")
+        finally:
+            close_old_connections()
+
+
+def _open_lot_rows(ledger):
+    """Lots of an OpenLot queryset as _fifo_match() lists, oldest first."""
+    return [
+        list(row) for row in ledger.order_by('date_of_holding', 'buy_transaction_id').values_list(
+            'remaining_qty', 'price', 'buy_transaction_id', 'date_of_holding'
+        )
+    ]
+
+
+def _save_open_lots(user, purchase_lots, ledger, batch_size=None):
+    """
+    Make the stored OpenLot rows of ``ledger`` (a queryset covering every item
+    in ``purchase_lots``) match the in-memory lots, touching only rows that differ.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'FIFO_WRITE_BATCH_SIZE', 1000)
+    stored = {
+        row[0]: row[1:] for row in ledger.values_list(
+            'buy_transaction_id', 'item_id', 'remaining_qty', 'price', 'date_of_holding'
+        )
+    }
+    created, updated = [], []
+    for item_id, lots in purchase_lots.items():
+        for qty, price, trans_id, date_of_holding in lots:
+            lot = OpenLot(
+                buy_transaction_id=trans_id, user=user, item_id=item_id,
+                date_of_holding=date_of_holding, remaining_qty=qty, price=price,
+            )
+            current = stored.pop(trans_id, None)
+            if current is None:
+                created.append(lot)
+            elif current != (item_id, qty, price, date_of_holding):
+                updated.append(lot)
+    if stored:
+        OpenLot.objects.filter(buy_transaction_id__in=list(stored)).delete()
+    OpenLot.objects.bulk_update(
+        updated, ['item', 'remaining_qty', 'price', 'date_of_holding'], batch_size=batch_size
+    )
+    OpenLot.objects.bulk_create(created, batch_size=batch_size)
+
+
+# Order of the TradeSummary values handled by the helpers below.
+SUMMARY_FIELDS = ['trade_count', 'bought_qty', 'sold_qty', 'sold_notional', 'realised_profit', 'last_trade_date']
+
+
+def _add_trade(summary, trans_type, quantity, price, date_of_holding, realised):
+    """Add one trade to a summary list in SUMMARY_FIELDS order."""
+    summary[0] += 1
+    if trans_type == 'Buy':
+        summary[1] += quantity
+    else:
+        summary[2] += quantity
+        summary[3] += price * quantity
+    summary[4] += realised
+    if summary[5] is None or date_of_holding > summary[5]:
+        summary[5] = date_of_holding
+
+
+def _summarise_trades(rows):
+    """
+    Summaries of (item_id, trans_type, quantity, price, date_of_holding, realised)
+    rows in replay order: ({item_id: values}, overall values), SUMMARY_FIELDS order.
+    """
+    per_item = {}
+    totals = [0, 0.0, 0.0, 0.0, 0.0, None]
+    for item_id, *trade in rows:
+        _add_trade(per_item.setdefault(item_id, [0, 0.0, 0.0, 0.0, 0.0, None]), *trade)
+        _add_trade(totals, *trade)
+    return per_item, totals
+
+
+def _save_trade_summaries(user, per_item, totals, batch_size=None):
+    """Make the user's Position rows and UserTradeTotals match, touching only what differs."""
+    stored = {position.item_id: position for position in Position.objects.filter(user=user)}
+    created, updated = [], []
+    for item_id, values in per_item.items():
+        position = stored.pop(item_id, None)
+        if position is None:
+            created.append(Position(user=user, item_id=item_id, **dict(zip(SUMMARY_FIELDS, values))))
+        elif [getattr(position, field) for field in SUMMARY_FIELDS] != values:
+            for field, value in zip(SUMMARY_FIELDS, values):
+                setattr(position, field, value)
+            updated.append(position)
+    if stored:
+        Position.objects.filter(id__in=[position.id for position in stored.values()]).delete()
+    Position.objects.bulk_update(updated, SUMMARY_FIELDS, batch_size=batch_size)
+    Position.objects.bulk_create(created, batch_size=batch_size)
+    UserTradeTotals.objects.update_or_create(user=user, defaults=dict(zip(SUMMARY_FIELDS, totals)))
+
+
+# Order of the DailyRollup values handled by the helpers below.
+ROLLUP_FIELDS = ['trade_count', 'buy_qty', 'buy_notional', 'sell_qty', 'sell_notional', 'realised_profit']
+
+
+def _add_to_rollup(rollup, trans_type, quantity, price, realised):
+    """Add one trade to a rollup list in ROLLUP_FIELDS order."""
+    rollup[0] += 1
+    if trans_type == 'Buy':
+        rollup[1] += quantity
+        rollup[2] += price * quantity
+    else:
+        rollup[3] += quantity
+        rollup[4] += price * quantity
+    rollup[5] += realised
+
+
+def _rollup_trades(rows):
+    """
+    Daily rollups of (item_id, trans_type, quantity, price, date_of_holding,
+    realised) rows in replay order: {(item_id, day): values}, ROLLUP_FIELDS order.
+    """
+    rollups = {}
+    for item_id, trans_type, quantity, price, day, realised in rows:
+        _add_to_rollup(rollups.setdefault((item_id, day), [0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+                       trans_type, quantity, price, realised)
+    return rollups
+
+
+def _save_daily_rollups(user, rollups, since_day=None, batch_size=None):
+    """
+    Make the user's DailyRollup rows (those from ``since_day`` on, if given)
+    match ``rollups``, touching only rows that differ.  Returns the ids of
+    the items whose rows changed, i.e. whose charts did.
+    """
+    stored_rows = DailyRollup.objects.filter(user=user)
+    if since_day is not None:
+        stored_rows = stored_rows.filter(day__gte=since_day)
+    stored = {(rollup.item_id, rollup.day): rollup for rollup in stored_rows}
+    created, updated = [], []
+    for (item_id, day), values in rollups.items():
+        rollup = stored.pop((item_id, day), None)
+        if rollup is None:
+            created.append(DailyRollup(user=user, item_id=item_id, day=day, **dict(zip(ROLLUP_FIELDS, values))))
+        elif [getattr(rollup, field) for field in ROLLUP_FIELDS] != values:
+            for field, value in zip(ROLLUP_FIELDS, values):
+                setattr(rollup, field, value)
+            updated.append(rollup)
+    if stored:
+        DailyRollup.objects.filter(id__in=[rollup.id for rollup in stored.values()]).delete()
+    DailyRollup.objects.bulk_update(updated, ROLLUP_FIELDS, batch_size=batch_size)
+    DailyRollup.objects.bulk_create(created, batch_size=batch_size)
+    return {rollup.item_id for rollup in [*created, *updated, *stored.values()]}
+
+
+def rebuild_daily_rollups(batch_size=None):
+    """
+    Rebuild the whole DailyRollup table from the stored transactions with one
+    grouped aggregate query.  Returns the number of rollup rows written.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'FIFO_WRITE_BATCH_SIZE', 1000)
+    sells = Q(trans_type='Sell')
+    rows = (
+        Transaction.objects.filter(user__isnull=False).order_by()
+        .values('user_id', 'item_id', 'date_of_holding')
+        .annotate(
+            trade_count=Count('id'),
+            buy_qty=Sum('quantity', filter=~sells),
+            buy_notional=Sum(F('price') * F('quantity'), filter=~sells),
+            sell_qty=Sum('quantity', filter=sells),
+            sell_notional=Sum(F('price') * F('quantity'), filter=sells),
+            realised_profit=Sum('realised_profit'),
+        )
+    )
+    with transaction.atomic():
+        DailyRollup.objects.all().delete()
+        created = DailyRollup.objects.bulk_create(
+            [
+                DailyRollup(
+                    user_id=row['user_id'], item_id=row['item_id'], day=row['date_of_holding'],
+                    **{field: row[field] or 0 for field in ROLLUP_FIELDS},
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=batch_size,
+        )
+    return len(created)
+
+
+def _add_trade_to_summaries(trans):
+    """Add a newly appended trade to its Position, the user's totals and its DailyRollup."""
+    trade = (trans.trans_type, trans.quantity, trans.price, trans.date_of_holding, trans.realised_profit)
+    for summary in (
+        Position.objects.select_for_update().get_or_create(user=trans.user, item_id=trans.item_id)[0],
+        UserTradeTotals.objects.select_for_update().get_or_create(user=trans.user)[0],
+    ):
+        values = [getattr(summary, field) for field in SUMMARY_FIELDS]
+        _add_trade(values, *trade)
+        for field, value in zip(SUMMARY_FIELDS, values):
+            setattr(summary, field, value)
+        summary.save(update_fields=SUMMARY_FIELDS)
+
+    rollup = DailyRollup.objects.select_for_update().get_or_create(
+        user=trans.user, item_id=trans.item_id, day=trans.date_of_holding
+    )[0]
+    values = [getattr(rollup, field) for field in ROLLUP_FIELDS]
+    _add_to_rollup(values, trans.trans_type, trans.quantity, trans.price, trans.realised_profit)
+    for field, value in zip(ROLLUP_FIELDS, values):
+        setattr(rollup, field, value)
+    rollup.save(update_fields=ROLLUP_FIELDS)
+
+
+def open_position(user, item):
+    """
+    Current holding of ``item`` for ``user`` from the OpenLot ledger:
+    {'quantity': ..., 'average_cost': ...} (average FIFO cost of what is still held).
+    """
+    totals = OpenLot.objects.filter(user=user, item=item).aggregate(
+        quantity=Sum('remaining_qty'),
+        cost=Sum(F('remaining_qty') * F('price')),
+    )
+    quantity = totals['quantity'] or 0
+    average_cost = (totals['cost'] / quantity) if quantity else 0
+    return {'quantity': quantity, 'average_cost': average_cost}
+
+
+def preview_sell_profit(user, item, quantity, price):
+    """
+    Realised profit a sell of ``quantity`` at ``price`` would book right now,
+    matched against the open lots without writing anything.
+    """
+    purchase_lots = {item.id: deque(_open_lot_rows(OpenLot.objects.filter(user=user, item=item)))}
+    return _fifo_match(purchase_lots, item.id, 'Sell', quantity, price)
+
+
+def _write_profits(changed, batch_size):
+    """
+    Write ``changed`` - (id, realised_profit, cumulative_profit) tuples - in
+    chunks of ``batch_size``.  On PostgreSQL each chunk is a single
+    ``UPDATE ... FROM (VALUES ...)`` round trip; other backends (SQLite in
+    development) run an executemany() per chunk.
+    """
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(changed), batch_size):
+            chunk = changed[start:start + batch_size]
+            if connection.vendor == 'postgresql':
+                values = ", ".join(["(%s::bigint, %s::double precision, %s::double precision)"] * len(chunk))
+                cursor.execute(
+                    f"UPDATE {table} AS t "
+                    f"SET realised_profit = v.realised_profit, cumulative_profit = v.cumulative_profit "
+                    f"FROM (VALUES {values}) AS v(id, realised_profit, cumulative_profit) "
+                    f"WHERE t.id = v.id",
+                    [value for row in chunk for value in row],
+                )
+            else:
+                cursor.executemany(
+                    f"UPDATE {table} SET realised_profit = %s, cumulative_profit = %s WHERE id = %s",
+                    [(realised, cumulative, trans_id) for trans_id, realised, cumulative in chunk],
+                )
+
+
+def calculate_fifo_for_all_users(workers=1, progress=None):
+    """
+    Used rarely (like after big CSV imports).
+    Recalculates for *every* user in the system.
+
+    Users are independent, so with ``workers`` > 1 they are spread over a
+    process pool (each worker process keeps its own database connection and
+    every user gets its own atomic block).  Must not be called inside an open
+    transaction in that case, the workers wouldn't see uncommitted rows.
+
+    ``progress(done, total, user_id, rows, error)`` is called as each user
+    finishes.  A failing user is reported there and skipped; the returned list
+    holds (user_id, error) for every failure.
+    """
+    user_rows = dict(
+        Transaction.objects.filter(user__isnull=False)
+        .values_list('user')
+        .annotate(rows=Count('id'))
+        .order_by()
+    )
+    total = len(user_rows)
+    failures = []
+    # Users whose transactions are all gone (e.g. wiped by an import) aren't visited below.
+    Position.objects.exclude(user__in=list(user_rows)).delete()
+    UserTradeTotals.objects.exclude(user__in=list(user_rows)).delete()
+    DailyRollup.objects.exclude(user__in=list(user_rows)).delete()
+
+    def report(done, result):
+        user_id, error = result
+        if error:
+            failures.append((user_id, error))
+        if progress:
+            progress(done, total, user_id, user_rows[user_id], error)
+
+    if workers <= 1 or total <= 1:
+        for done, user_id in enumerate(user_rows, start=1):
+            report(done, _recalculate_user(user_id))
+        return failures
+
+    # Forked workers must not inherit (and share) the parent's connection.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_fifo_worker) as pool:
+        futures = {pool.submit(_recalculate_user, user_id): user_id for user_id in user_rows}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except Exception as exc:
+                # The worker itself died (BrokenProcessPool) or its result didn't come back.
+                logger.exception("FIFO recalculation of user %s failed", futures[future])
+                result = futures[future], f"{type(exc).__name__}: {exc}"
+            report(done, result)
+    return failures
+
+
+def _init_fifo_worker():
+    """Process-pool initializer; needed where workers are spawned rather than forked."""
+    import django
+    django.setup()
+
+
+def _recalculate_user(user_id):
+    """Recalculate one user, returning (user_id, error message or None)."""
+    try:
+        calculate_fifo_for_user(User.objects.get(id=user_id), warm_charts=False)
+    except Exception as exc:
+        logger.exception("FIFO recalculation of user %s failed", user_id)
+        return user_id, f"{type(exc).__name__}: {exc}"
+    return user_id, None
@@ -0,0 +1,100 @@
+# trades/fifo_kernel.py
+
+"""
+Array implementation of the FIFO matching used by calculate_fifo_for_user().
+
+fifo_kernel() is a pure function over column arrays, so it can be tested
+against the row-by-row _fifo_match() loop and reused anywhere a whole
+history has to be recomputed.
+
+Per item, buys lay their quantities end to end on a "bought so far" axis.
+Sells consume that axis from the left: after row j the consumed amount is
+    c[j] = min(c[j-1] + sold[j], bought[j])
+(a sell can only use lots bought before it; any excess is dropped, like the
+loop does).  With cumulative sums B (bought) and Q (sold) this unrolls to
+    c = Q + min(0, cummin(B - Q))
+and a sell's cost is the integral of the lot prices over (c[j-1], c[j]],
+looked up with searchsorted on the buy lots' end offsets.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .fifo import FEE_FACTOR
+
+FifoResult = namedtuple('FifoResult', ['realised', 'cumulative', 'remaining'])
+
+
+def fifo_kernel(item_ids, is_sell, quantities, prices, order=None, fee_factor=FEE_FACTOR):
+    """
+    Realised FIFO profit for a trade history given as equal-length arrays.
+
+    ``order`` is an optional permutation giving the replay order
+    (date_of_holding, trans_type, id); without it the arrays are taken to be
+    in replay order already.  Returns a FifoResult of arrays aligned with the
+    inputs:
+
+    - realised: profit booked by each row (0 for buys),
+    - cumulative: running total of realised in replay order,
+    - remaining: quantity of each buy that is still open (0 for sells).
+    """
+    item_ids = np.asarray(item_ids)
+    is_sell = np.asarray(is_sell, dtype=bool)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    size = len(item_ids)
+    if order is None:
+        order = np.arange(size)
+    else:
+        order = np.asarray(order)
+
+    # Replay order, then grouped by item (stable, so each group stays in replay order).
+    by_item = order[np.argsort(item_ids[order], kind='stable')]
+    grouped_items = item_ids[by_item]
+    starts = np.flatnonzero(np.r_[True, grouped_items[1:] != grouped_items[:-1]]) if size else []
+    ends = np.r_[starts[1:], size] if size else []
+
+    realised = np.zeros(size)
+    remaining = np.zeros(size)
+    for start, end in zip(starts, ends):
+        rows = by_item[start:end]
+        profit, left = _match_item(is_sell[rows], quantities[rows], prices[rows], fee_factor)
+        realised[rows] = profit
+        remaining[rows] = left
+
+    cumulative = np.empty(size)
+    cumulative[order] = np.cumsum(realised[order])
+    return FifoResult(realised, cumulative, remaining)
+
+
+def _match_item(sell, qty, price, fee_factor):
+    """FIFO matching for one item's rows in replay order; returns (realised, remaining)."""
+    bought = np.cumsum(np.where(sell, 0.0, qty))
+    sold = np.cumsum(np.where(sell, qty, 0.0))
+    consumed = sold + np.minimum(np.minimum.accumulate(bought - sold), 0.0)
+    consumed_before = np.r_[0.0, consumed[:-1]]
+
+    realised = np.zeros(len(qty))
+    remaining = np.zeros(len(qty))
+    buys = ~sell
+    if not buys.any():
+        return realised, remaining
+
+    lot_end = bought[buys]
+    lot_price = price[buys]
+    lot_cost_end = np.cumsum(qty[buys] * lot_price)
+
+    def cost_up_to(x):
+        lot = np.minimum(np.searchsorted(lot_end, x, side='left'), len(lot_end) - 1)
+        return lot_cost_end[lot] - (lot_end[lot] - x) * lot_price[lot]
+
+    used = consumed[sell] - consumed_before[sell]
+    cost = np.where(used > 0, cost_up_to(consumed[sell]) - cost_up_to(consumed_before[sell]), 0.0)
+    realised[sell] = price[sell] * used * fee_factor - cost
+
+    left = np.clip(lot_end - consumed[-1], 0.0, qty[buys])
+    # Float noise from the cumulative sums must not leave "ghost" lots behind.
+    left[left <= lot_end * 1e-12] = 0.0
+    remaining[buys] = left
+    return realised, remaining
@@ -1,17 +1,23 @@
 # trades/forms.py
 
 from django import forms
+from django.db import IntegrityError, transaction as db_transaction
 from django.utils import timezone
 from .models import (
-    Transaction, Alias, Item, AccumulationPrice, TargetSellPrice,
+    Transaction, Alias, AccumulationPrice, TargetSellPrice,
     Membership, WealthData, Watchlist
 )
+from .resolver import resolve_or_create_item
 
 class TransactionManualItemForm(forms.Form):
     """
     Lets the user type an item name or short name to add a new transaction.
     """
-    item_name = forms.CharField(label="Item Name", max_length=200)
+    item_name = forms.CharField(
+        label="Item Name",
+        max_length=200,
+        widget=forms.TextInput(attrs={'list': 'item-suggestions', 'autocomplete': 'off'}),
+    )
     trans_type = forms.ChoiceField(choices=Transaction.TYPE_CHOICES, initial=Transaction.BUY)
     price = forms.FloatField(label="Price (millions)")
     quantity = forms.FloatField(label="Quantity")  # NO LONGER in millions
@@ -29,18 +35,7 @@ class TransactionManualItemForm(forms.Form):
         quantity = self.cleaned_data['quantity']
         date_of_holding = self.cleaned_data['date_of_holding']
 
-        alias = Alias.objects.filter(short_name__iexact=name_input).first()
-        if not alias:
-            alias = Alias.objects.filter(full_name__iexact=name_input).first()
-
-        if alias:
-            item_obj = Item.objects.filter(name__iexact=alias.full_name).first()
-            if not item_obj:
-                item_obj = Item.objects.create(name=alias.full_name)
-        else:
-            item_obj = Item.objects.filter(name__iexact=name_input).first()
-            if not item_obj:
-                item_obj = Item.objects.create(name=name_input)
+        item_obj = resolve_or_create_item(name_input)
 
         new_trans = Transaction.objects.create(
             user=user,  # attach to the user if provided
@@ -78,10 +73,13 @@ class TransactionEditForm(forms.Form):
         self.fields['date_of_holding'].initial = transaction.date_of_holding
 
     def update_transaction(self, user=None):
-        from .models import Transaction, Alias, Item
+        from .models import Transaction
 
         trans_id = self.cleaned_data['transaction_id']
         transaction = Transaction.objects.get(id=trans_id)
+        # FIFO position before the edit, so the caller can recalculate from
+        # whichever of the old/new positions comes first.
+        self.original_position = (transaction.date_of_holding, transaction.trans_type, transaction.id)
 
         name_input = self.cleaned_data['item_name'].strip()
         trans_type = self.cleaned_data['trans_type']
@@ -89,18 +87,7 @@ class TransactionEditForm(forms.Form):
         quantity = self.cleaned_data['quantity']
         date_of_holding = self.cleaned_data['date_of_holding']
 
-        alias = Alias.objects.filter(short_name__iexact=name_input).first()
-        if not alias:
-            alias = Alias.objects.filter(full_name__iexact=name_input).first()
-
-        if alias:
-            item_obj = Item.objects.filter(name__iexact=alias.full_name).first()
-            if not item_obj:
-                item_obj = Item.objects.create(name=alias.full_name)
-        else:
-            item_obj = Item.objects.filter(name__iexact=name_input).first()
-            if not item_obj:
-                item_obj = Item.objects.create(name=name_input)
+        item_obj = resolve_or_create_item(name_input)
 
         transaction.item = item_obj
         transaction.trans_type = trans_type
@@ -121,17 +108,21 @@ class AliasForm(forms.ModelForm):
         model = Alias
         fields = ['full_name', 'short_name', 'image_file']
 
-    def clean(self):
-        cleaned_data = super().clean()
-        full_name = cleaned_data.get('full_name')
-        short_name = cleaned_data.get('short_name')
-
-        qs = Alias.objects.filter(full_name=full_name, short_name=short_name)
-        if self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
-            raise forms.ValidationError("This alias already exists.")
-        return cleaned_data
+    def save(self, commit=True):
+        """
+        Duplicate names (ignoring case) are already reported by is_valid(),
+        which checks the trades_alias_names_lower_uniq constraint.  The
+        IntegrityError branch only covers a duplicate saved by a concurrent
+        request between validation and this insert.
+        """
+        if not commit:
+            return super().save(commit=False)
+        try:
+            with db_transaction.atomic():
+                return super().save()
+        except IntegrityError:
+            self.add_error(None, "This alias already exists.")
+            return None
 
 
 
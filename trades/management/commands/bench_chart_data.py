@@ -0,0 +1,193 @@
+# trades/management/commands/bench_chart_data.py
+
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+
+from trades.chart_data import Series, item_price_series, item_profit_series
+from trades.models import Item, Transaction
+from trades.fifo import calculate_fifo_for_user
+
+
+def legacy_item_price_series(user, item, timeframe):
+    """The old per-row load and per-bucket groupby().apply(), spread over a daily index."""
+    qs = Transaction.objects.filter(user=user, item=item).order_by('date_of_holding', 'id')
+    rows = []
+    for t in qs:
+        rows.append({
+            'trans_type': t.trans_type,
+            'price': t.price,
+            'quantity': t.quantity,
+            'date': t.date_of_holding
+        })
+    if not rows:
+        return None
+
+    df_orig = pd.DataFrame(rows)
+    df_orig['date'] = pd.to_datetime(df_orig['date'])
+    # group by the "timeframe" key
+    def date_key(d):
+        if timeframe == 'Monthly':
+            return (d.year, d.month)
+        elif timeframe == 'Yearly':
+            return d.year
+        else:
+            return d
+
+    df_orig['group_key'] = df_orig['date'].apply(date_key)
+
+    buy_df = df_orig[df_orig['trans_type'] == 'Buy'].groupby('group_key').apply(
+        lambda g: (g['price'] * g['quantity']).sum() / g['quantity'].sum()
+    ).rename('buy_price').reset_index()
+
+    sell_df = df_orig[df_orig['trans_type'] == 'Sell'].groupby('group_key').apply(
+        lambda g: (g['price'] * g['quantity']).sum() / g['quantity'].sum()
+    ).rename('sell_price').reset_index()
+
+    merged = pd.merge(buy_df, sell_df, on='group_key', how='outer')
+
+    # Convert group_key back to a real date. If daily, we can use it directly.
+    # If monthly or yearly, pick an arbitrary day in that month/year:
+    def key_to_date(k):
+        if isinstance(k, tuple):  # (year, month)
+            return pd.to_datetime(f"{k[0]}-{k[1]:02d}-01")
+        elif isinstance(k, int):  # year
+            return pd.to_datetime(f"{k}-01-01")
+        else:
+            return pd.to_datetime(k)  # daily is already a date
+
+    merged['date'] = merged['group_key'].apply(key_to_date)
+    merged.set_index('date', inplace=True)
+    # Replace 0 with NaN to avoid dropping to zero lines
+    merged['buy_price'] = merged['buy_price'].replace(0, pd.NA)
+    merged['sell_price'] = merged['sell_price'].replace(0, pd.NA)
+
+    # Resample daily so lines are continuous; forward-fill
+    # (If timeframe is monthly/yearly, you might prefer monthly steps, but daily ensures continuous lines).
+    merged = merged.resample('D').asfreq()
+    merged['buy_price'] = merged['buy_price'].ffill()
+    merged['sell_price'] = merged['sell_price'].ffill()
+    return Series(merged.index, {
+        'buy_price': merged['buy_price'].to_numpy(dtype=float, na_value=np.nan),
+        'sell_price': merged['sell_price'].to_numpy(dtype=float, na_value=np.nan),
+    })
+
+
+def legacy_item_profit_series(user, item, timeframe):
+    """The old per-row load and apply() bucket keys."""
+    qs = Transaction.objects.filter(user=user, item=item).order_by('date_of_holding', 'id')
+    rows = []
+    for t in qs:
+        rows.append({
+            'date': t.date_of_holding,
+            'realised_profit': t.realised_profit
+        })
+    if not rows:
+        return None
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+
+    # Group by timeframe (Daily/Monthly/Yearly) and sum realized profits in each bucket
+    def date_key(d):
+        if timeframe == 'Monthly':
+            return (d.year, d.month)
+        elif timeframe == 'Yearly':
+            return d.year
+        else:
+            return d
+
+    df['group_key'] = df['date'].apply(date_key)
+    gp = df.groupby('group_key')['realised_profit'].sum().reset_index()
+    gp.rename(columns={'realised_profit': 'bucket_profit'}, inplace=True)
+
+    # Convert group_key back to a date/time index so we can resample or plot easily
+    def key_to_date(k):
+        if isinstance(k, tuple):
+            return pd.to_datetime(f"{k[0]}-{k[1]:02d}-01")
+        elif isinstance(k, int):
+            return pd.to_datetime(f"{k}-01-01")
+        else:
+            return pd.to_datetime(k)
+
+    gp['date'] = gp['group_key'].apply(key_to_date)
+    gp.sort_values('date', inplace=True)
+    gp.set_index('date', inplace=True)
+
+    # Now compute cumulative sum
+    gp['cumulative_profit'] = gp['bucket_profit'].cumsum()
+
+    # Forward-fill daily if timeframe == Daily.
+    if timeframe == 'Daily':
+        # Reindex to daily range
+        all_days = pd.date_range(gp.index.min(), gp.index.max(), freq='D')
+        gp = gp.reindex(all_days)
+        gp['cumulative_profit'] = gp['cumulative_profit'].ffill()
+    return Series(gp.index, {'cumulative_profit': gp['cumulative_profit'].to_numpy()})
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the item chart series preparation (DailyRollup + resample vs the old "
+        "per-transaction groupby/apply code). Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[100_000],
+            help="Transactions for the benchmarked item (default 100000).",
+        )
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Also time the old groupby/apply implementation (slow at large sizes).",
+        )
+
+    def handle(self, *args, **options):
+        for rows in options["rows"]:
+            with db_transaction.atomic():
+                self.run_size(rows, options["legacy"])
+                db_transaction.set_rollback(True)
+
+    def run_size(self, size, legacy):
+        user = User.objects.create(username=f"__bench_chart_data_{size}")
+        item = Item.objects.create(name=f"__bench_chart_data_item_{size}")
+        rng = random.Random(size)
+        start = date(2015, 1, 1)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=user,
+                    item=item,
+                    trans_type=rng.choice(["Buy", "Sell"]),
+                    price=rng.randint(1, 1000) * 1_000_000,
+                    quantity=rng.randint(1, 100),
+                    date_of_holding=start + timedelta(days=rng.randint(0, 3650)),
+                )
+                for _ in range(size)
+            ],
+            batch_size=5000,
+        )
+        calculate_fifo_for_user(user)  # profits and the DailyRollup rows the series read
+        self.stdout.write(self.style.SUCCESS(f"{size:,} transactions for one item"))
+
+        runs = [("price", item_price_series), ("profit", item_profit_series)]
+        if legacy:
+            runs += [("price (legacy)", legacy_item_price_series), ("profit (legacy)", legacy_item_profit_series)]
+        for label, prepare in runs:
+            for timeframe in ("Daily", "Monthly", "Yearly"):
+                started = time.perf_counter()
+                series = prepare(user, item, timeframe)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {label:<16} {timeframe:<8} {len(series.dates):>6,} points  {elapsed:8.3f}s"
+                )
@@ -0,0 +1,84 @@
+# trades/management/commands/bench_charts.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from django.core.management.base import BaseCommand
+
+from trades import chart_data, chart_formats, charts
+
+
+def render_sample(points, seed, max_points=None, **options):
+    """
+    One item-price style chart (two series) over ``points`` days, LTTB-reduced
+    to ``max_points``; ``options`` go to line_chart() (fmt, figsize, dpi).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-01', periods=points, freq='D')
+    buy = np.cumsum(rng.normal(0, 1_000_000, points)) + 50_000_000
+    series = chart_data.downsample(
+        chart_data.Series(dates, {'buy': buy, 'sell': buy * 1.05}), max_points
+    )
+    return charts.line_chart(
+        series.dates, [(series.columns['buy'], 'green', 'Buy Price'), (series.columns['sell'], 'red', 'Sell Price')],
+        title="Benchmark", ylabel="Price", max_xticks=10, align_xticks='right', legend=True, **options,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark trades.charts: PNG renders per second, single-threaded and with a thread pool, "
+        "then bytes and render time per image format and width."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=50, help="Charts per run (default 50).")
+        parser.add_argument("--points", type=int, default=365, help="Points per series (default 365).")
+        parser.add_argument(
+            "--max-points",
+            type=int,
+            default=charts.pixel_width((10, 4)),
+            help="LTTB point budget per series, 0 to plot every point (default: chart width in pixels).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Threads for the concurrent run (default: CPU count).",
+        )
+
+    def handle(self, *args, **options):
+        renders, points, threads = options["renders"], options["points"], options["threads"]
+        max_points = options["max_points"]
+        render_sample(points, 0, max_points)  # warm up fonts and caches
+
+        started = time.perf_counter()
+        for seed in range(renders):
+            render_sample(points, seed, max_points)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"1 thread:   {renders / elapsed:8.1f} renders/sec")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda seed: render_sample(points, seed, max_points), range(renders)))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{threads} threads: {renders / elapsed:8.1f} renders/sec "
+            f"({renders / elapsed / threads:.1f} per thread)"
+        )
+
+        self.stdout.write("format  width      bytes  ms/render")
+        for width in (1000, 500):
+            for image_format in chart_formats.PREFERENCE:
+                options = {'fmt': image_format, 'figsize': (width / charts.DPI, width * 0.4 / charts.DPI)}
+                started = time.perf_counter()
+                sizes = [len(render_sample(points, seed, min(max_points, width), **options))
+                         for seed in range(renders)]
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{image_format:6s} {width:6d} {sum(sizes) / renders:10.0f} {elapsed / renders * 1000:10.1f}"
+                )
@@ -0,0 +1,147 @@
+# trades/management/commands/bench_fifo.py
+
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction as db_transaction
+
+from trades.fifo_kernel import fifo_kernel
+from trades.models import Item, Transaction
+from trades.fifo import calculate_fifo_for_user, _fifo_match
+
+
+def legacy_calculate_fifo_for_user(user):
+    """The old write phase: zero every row, then one full-row save() per transaction."""
+    with db_transaction.atomic():
+        Transaction.objects.filter(user=user).update(realised_profit=0.0, cumulative_profit=0.0)
+        purchase_lots = {}
+        cumulative_sum = 0.0
+        user_trans = Transaction.objects.filter(user=user).order_by('date_of_holding', 'trans_type', 'id')
+        for trans in user_trans:
+            trans.realised_profit = _fifo_match(
+                purchase_lots, trans.item_id, trans.trans_type, trans.quantity, trans.price
+            )
+            cumulative_sum += trans.realised_profit
+            trans.cumulative_profit = cumulative_sum
+            trans.save()
+
+
+class RoundTripCounter:
+    """connection.execute_wrapper() hook counting statements sent to the database."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the FIFO write phase (round trips and wall time) against the old "
+        "per-row save(). Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000],
+            help="Transaction counts to benchmark (default 10000 100000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="bulk_update chunk size (default settings.FIFO_WRITE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--items",
+            type=int,
+            default=200,
+            help="Number of distinct items in the synthetic history (default 200).",
+        )
+        parser.add_argument(
+            "--kernel",
+            action="store_true",
+            help="Benchmark fifo_kernel() against the per-row loop in memory (no database).",
+        )
+
+    def handle(self, *args, **options):
+        if options["kernel"]:
+            for size in options["sizes"]:
+                self.run_kernel(size, options["items"])
+            return
+        for size in options["sizes"]:
+            with db_transaction.atomic():
+                self.run_size(size, options["items"], options["batch_size"])
+                db_transaction.set_rollback(True)
+
+    def run_size(self, size, item_count, batch_size):
+        user = User.objects.create(username=f"__bench_fifo_{size}")
+        items = Item.objects.bulk_create(
+            [Item(name=f"__bench_fifo_item_{size}_{i}") for i in range(item_count)]
+        )
+        rng = random.Random(size)
+        start = date(2020, 1, 1)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=user,
+                    item=rng.choice(items),
+                    trans_type=rng.choice(["Buy", "Buy", "Sell"]),
+                    price=rng.randint(1, 1000) * 1_000_000,
+                    quantity=rng.randint(1, 100),
+                    date_of_holding=start + timedelta(days=rng.randint(0, 1500)),
+                )
+                for _ in range(size)
+            ],
+            batch_size=5000,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{size:,} transactions"))
+
+        runs = [
+            ("legacy save() per row", lambda: legacy_calculate_fifo_for_user(user)),
+            ("batched, from zero", lambda: calculate_fifo_for_user(user, batch_size=batch_size)),
+            ("batched, nothing changed", lambda: calculate_fifo_for_user(user, batch_size=batch_size)),
+        ]
+        for label, run in runs:
+            # The "from zero" run must actually rewrite every non-trivial row.
+            if label.endswith("from zero"):
+                Transaction.objects.filter(user=user).update(realised_profit=0.0, cumulative_profit=0.0)
+            counter = RoundTripCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  {label:<30} {counter.count:>8,} round trips  {elapsed:8.2f}s"
+            )
+
+    def run_kernel(self, size, item_count):
+        rng = np.random.default_rng(size)
+        item_ids = rng.integers(0, item_count, size)
+        is_sell = rng.random(size) < 0.4
+        quantities = rng.integers(1, 100, size).astype(float)
+        prices = rng.integers(1, 1000, size) * 1_000_000.0
+        self.stdout.write(self.style.SUCCESS(f"{size:,} transactions (in memory)"))
+
+        started = time.perf_counter()
+        fifo_kernel(item_ids, is_sell, quantities, prices)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {'fifo_kernel':<30} {elapsed:8.2f}s")
+
+        started = time.perf_counter()
+        purchase_lots = {}
+        for row in zip(item_ids.tolist(), is_sell.tolist(), quantities.tolist(), prices.tolist()):
+            item_id, sell, quantity, price = row
+            _fifo_match(purchase_lots, item_id, "Sell" if sell else "Buy", quantity, price)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {'per-row _fifo_match loop':<30} {elapsed:8.2f}s")
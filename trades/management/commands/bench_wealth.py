@@ -0,0 +1,84 @@
+# trades/management/commands/bench_wealth.py
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+
+from trades.models import WealthData
+from trades.wealth import MONTH_FIELDS, rebuild_points
+from trades.wealth_analytics import GROWTH_WINDOWS, analyse
+
+
+def legacy_analytics(account_name):
+    """The old per-record string parsing, with the analytics as plain Python loops over the totals."""
+    monthly_totals = {}
+    for rec in WealthData.objects.filter(account_name=account_name).order_by('year'):
+        for i, m in enumerate(MONTH_FIELDS, start=1):
+            try:
+                val = float((getattr(rec, m) or "0").replace(',', '').strip())
+            except:
+                val = 0
+            key = (rec.year, i)
+            monthly_totals[key] = monthly_totals.get(key, 0) + val
+    keys = sorted(monthly_totals)
+    totals = [monthly_totals[key] or None for key in keys]
+    results = {'change': [], 'drawdown': []}
+    peak = None
+    for i, total in enumerate(totals):
+        previous = totals[i - 1] if i else None
+        results['change'].append(total - previous if total is not None and previous is not None else None)
+        for months in GROWTH_WINDOWS:
+            base = totals[i - months] if i >= months else None
+            results.setdefault(months, []).append(total / base - 1 if total is not None and base else None)
+        if total is not None:
+            peak = total if peak is None else max(peak, total)
+        results['drawdown'].append(total / peak - 1 if total is not None and peak and peak > 0 else None)
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the wealth analytics (one WealthPoint query into a NumPy matrix vs parsing "
+        "every WealthData row in Python). Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=50, help="WealthData rows per year (default 50).")
+        parser.add_argument("--years", type=int, default=20, help="Years of data (default 20).")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs of each implementation (default 5).")
+
+    def handle(self, *args, **options):
+        with db_transaction.atomic():
+            self.run(options["accounts"], options["years"], options["repeat"])
+            db_transaction.set_rollback(True)
+
+    def run(self, accounts, years, repeat):
+        account_name = "__bench_wealth"
+        rng = random.Random(accounts * years)
+        WealthData.objects.bulk_create(
+            [
+                WealthData(
+                    account_name=account_name,
+                    year=2000 + year,
+                    **{field: f"{rng.randint(0, 10_000_000):,}" for field in MONTH_FIELDS},
+                )
+                for year in range(years)
+                for _ in range(accounts)
+            ],
+            batch_size=1000,
+        )
+        started = time.perf_counter()
+        points = rebuild_points()
+        self.stdout.write(self.style.SUCCESS(
+            f"{accounts} accounts x {years} years: {points:,} points, rebuilt in {time.perf_counter() - started:.3f}s"
+        ))
+
+        for label, compute in [("vectorized", analyse), ("legacy", legacy_analytics)]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                compute(account_name)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f"  {label:<12} best {min(timings) * 1000:8.1f}ms  mean {sum(timings) / repeat * 1000:8.1f}ms")
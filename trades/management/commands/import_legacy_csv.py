@@ -3,17 +3,18 @@
 import os
 import csv
 from datetime import datetime
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction as db_transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
 
 from trades.models import (
     Alias, Item, AccumulationPrice, TargetSellPrice,
     Membership, WealthData, Watchlist, Transaction
 )
-# Use the new function that can recalc for all users, but only once at end.
-from trades.views import calculate_fifo_for_all_users
 
 
 class Command(BaseCommand):
@@ -26,11 +27,25 @@ class Command(BaseCommand):
             default=".",
             help="Directory containing the CSV files (default current directory).",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes for the final FIFO recalculation (default 1).",
+        )
 
-    @db_transaction.atomic
     def handle(self, *args, **options):
-        csv_dir = options["csvdir"]
+        # The import itself is all-or-nothing; the FIFO recalculation runs after
+        # it has committed so that parallel workers can see the imported rows.
+        with db_transaction.atomic():
+            self.import_all(options["csvdir"])
+
+        # Recalc FIFO for all users (only once, after entire import).
+        call_command("recalculate_fifo", workers=options["workers"], stdout=self.stdout, stderr=self.stderr)
+
+        self.stdout.write(self.style.SUCCESS("All CSV imports completed successfully!"))
 
+    def import_all(self, csv_dir):
         self.stdout.write(self.style.SUCCESS(f"Starting CSV import from directory: {csv_dir}"))
 
         # --- NEW CODE: Delete old transaction data to avoid duplicates ---
@@ -79,12 +94,6 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING(f"File not found: {wealth_csv} (skipping)"))
 
-        # Recalc FIFO for all users (only once, after entire import).
-        self.stdout.write(self.style.SUCCESS("Recalculating FIFO profits for all users..."))
-        calculate_fifo_for_all_users()
-
-        self.stdout.write(self.style.SUCCESS("All CSV imports completed successfully!"))
-
     def import_aliases(self, filepath):
         self.stdout.write(f"Importing aliases from {filepath}...")
         with open(filepath, "r", encoding="utf-8-sig") as f:
@@ -93,10 +102,16 @@ class Command(BaseCommand):
                 full_name = row["FullName"].strip()
                 short_name = row["ShortName"].strip()
                 image_path = row["ImagePath"].strip()
-                alias, _ = Alias.objects.get_or_create(
-                    full_name=full_name,
-                    short_name=short_name
-                )
+                # Names are unique case-insensitively: a row that only differs
+                # in case updates the existing alias.  Compared as LOWER(...),
+                # like the unique constraint, so its index serves the lookup.
+                alias = (Alias.objects
+                         .annotate(full_name_lower=Lower('full_name'), short_name_lower=Lower('short_name'))
+                         .filter(full_name_lower=Lower(Value(full_name)), short_name_lower=Lower(Value(short_name)))
+                         .order_by('id')
+                         .first())
+                if alias is None:
+                    alias = Alias(full_name=full_name, short_name=short_name)
                 alias.image_path = image_path
                 alias.save()
         self.stdout.write(self.style.SUCCESS("Aliases imported."))
@@ -0,0 +1,33 @@
+# trades/management/commands/process_fifo_queue.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trades.fifo import process_fifo_recalc_requests
+
+
+class Command(BaseCommand):
+    help = "Drain pending FIFO recalculation requests (e.g. from cron or a long-running process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new requests instead of exiting once the queue is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds between polls with --loop (default 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_fifo_recalc_requests()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} FIFO recalculation(s)."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,17 @@
+# trades/management/commands/rebuild_rollups.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trades.fifo import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyRollup table from scratch from the stored transactions."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_daily_rollups()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written:,} daily rollups in {elapsed:.1f}s."))
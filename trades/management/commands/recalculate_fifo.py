@@ -0,0 +1,46 @@
+# trades/management/commands/recalculate_fifo.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trades.fifo import calculate_fifo_for_all_users
+
+
+class Command(BaseCommand):
+    help = "Recalculate FIFO realised/cumulative profits for every user with transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, one database connection each (default 1).",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        self.stdout.write(f"Recalculating FIFO profits with {workers} worker(s)...")
+        started = time.perf_counter()
+        totals = {"rows": 0}
+
+        def progress(done, total, user_id, rows, error):
+            totals["rows"] += rows
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            if error:
+                self.stderr.write(self.style.ERROR(f"User {user_id} failed: {error}"))
+            if error or done == total or done % max(1, total // 20) == 0:
+                self.stdout.write(
+                    f"[{done}/{total}] {done / elapsed:,.1f} users/sec, "
+                    f"{totals['rows'] / elapsed:,.0f} rows/sec"
+                )
+
+        failures = calculate_fifo_for_all_users(workers=workers, progress=progress)
+        elapsed = time.perf_counter() - started
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f"FIFO recalculation finished in {elapsed:.1f}s with {len(failures)} failed user(s): "
+                + ", ".join(str(user_id) for user_id, _ in failures)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"FIFO recalculation finished in {elapsed:.1f}s."))
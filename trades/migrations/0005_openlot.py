@@ -0,0 +1,64 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_open_lots(apps, schema_editor):
+    """Replay every user's history once to seed the ledger with the lots still open."""
+    Transaction = apps.get_model('trades', 'Transaction')
+    OpenLot = apps.get_model('trades', 'OpenLot')
+    purchase_lots = {}  # {(user_id, item_id): [[qty, price, trans_id, date], ...]}
+    rows = Transaction.objects.order_by('user_id', 'date_of_holding', 'trans_type', 'id').values_list(
+        'user_id', 'item_id', 'trans_type', 'quantity', 'price', 'id', 'date_of_holding'
+    )
+    for user_id, item_id, trans_type, quantity, price, trans_id, date_of_holding in rows.iterator():
+        lots = purchase_lots.setdefault((user_id, item_id), [])
+        if trans_type == 'Buy':
+            lots.append([quantity, price, trans_id, date_of_holding])
+            continue
+        qty_to_sell = quantity
+        while qty_to_sell > 0 and lots:
+            used = min(qty_to_sell, lots[0][0])
+            lots[0][0] -= used
+            qty_to_sell -= used
+            if lots[0][0] <= 0:
+                lots.pop(0)
+    OpenLot.objects.bulk_create(
+        [
+            OpenLot(
+                buy_transaction_id=trans_id, user_id=user_id, item_id=item_id,
+                date_of_holding=date_of_holding, remaining_qty=qty, price=price,
+            )
+            for (user_id, item_id), lots in purchase_lots.items()
+            for qty, price, trans_id, date_of_holding in lots
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0004_transaction_trades_tran_user_id_e9afa0_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenLot',
+            fields=[
+                ('buy_transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='open_lot', serialize=False, to='trades.transaction')),
+                ('date_of_holding', models.DateField()),
+                ('remaining_qty', models.FloatField()),
+                ('price', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trades.item')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'item', 'date_of_holding', 'buy_transaction'], name='trades_open_user_id_82e1c2_idx')],
+            },
+        ),
+        migrations.RunPython(build_open_lots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0005_openlot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FifoRecalcRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('since_date', models.DateField(blank=True, null=True)),
+                ('since_type', models.CharField(blank=True, max_length=4)),
+                ('since_id', models.BigIntegerField(blank=True, null=True)),
+                ('requested_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fifo_recalc_request', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
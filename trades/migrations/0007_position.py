@@ -0,0 +1,84 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Q, Sum
+
+
+def build_summaries(apps, schema_editor):
+    """Seed Position/UserTradeTotals from the stored transactions with grouped aggregates."""
+    Transaction = apps.get_model('trades', 'Transaction')
+    Position = apps.get_model('trades', 'Position')
+    UserTradeTotals = apps.get_model('trades', 'UserTradeTotals')
+    sells = Q(trans_type='Sell')
+    aggregates = dict(
+        trade_count=Count('id'),
+        bought_qty=Sum('quantity', filter=~sells),
+        sold_qty=Sum('quantity', filter=sells),
+        sold_notional=Sum(F('price') * F('quantity'), filter=sells),
+        realised_profit=Sum('realised_profit'),
+        last_trade_date=Max('date_of_holding'),
+    )
+    trades = Transaction.objects.filter(user__isnull=False).order_by()
+
+    def values(row):
+        summary = {name: row[name] or 0 for name in aggregates}
+        summary['last_trade_date'] = row['last_trade_date']
+        return summary
+
+    Position.objects.bulk_create(
+        [Position(user_id=row['user'], item_id=row['item'], **values(row))
+         for row in trades.values('user', 'item').annotate(**aggregates)],
+        batch_size=1000,
+    )
+    UserTradeTotals.objects.bulk_create(
+        [UserTradeTotals(user_id=row['user'], **values(row))
+         for row in trades.values('user').annotate(**aggregates)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('trades', '0006_fiforecalcrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTradeTotals',
+            fields=[
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('bought_qty', models.FloatField(default=0.0)),
+                ('sold_qty', models.FloatField(default=0.0)),
+                ('sold_notional', models.FloatField(default=0.0)),
+                ('realised_profit', models.FloatField(default=0.0)),
+                ('last_trade_date', models.DateField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trade_totals', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('bought_qty', models.FloatField(default=0.0)),
+                ('sold_qty', models.FloatField(default=0.0)),
+                ('sold_notional', models.FloatField(default=0.0)),
+                ('realised_profit', models.FloatField(default=0.0)),
+                ('last_trade_date', models.DateField(blank=True, null=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trades.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'item'), name='trades_position_user_item_uniq')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:49
+
+import logging
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+logger = logging.getLogger(__name__)
+
+
+def drop_duplicate_aliases(apps, schema_editor):
+    """
+    Aliases differing only in case would violate the new unique constraint.
+    Keep the oldest of each group, which is the one name lookups resolved to.
+    """
+    Alias = apps.get_model('trades', 'Alias')
+    kept = {}
+    duplicates = []
+    rows = Alias.objects.annotate(full_key=Lower('full_name'), short_key=Lower('short_name'))
+    for alias in rows.order_by('id'):
+        key = (alias.full_key, alias.short_key)
+        if key in kept:
+            # The image file itself stays on disk; only the row goes.
+            logger.warning(
+                "Deleting alias %s (%r / %r, image_path %r, image_file %r): same names as alias %s",
+                alias.pk, alias.full_name, alias.short_name, alias.image_path, alias.image_file.name, kept[key],
+            )
+            duplicates.append(alias.pk)
+        else:
+            kept[key] = alias.pk
+    Alias.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0007_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_aliases, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='alias',
+            index=models.Index(django.db.models.functions.text.Lower('short_name'), name='trades_alias_short_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='trades_item_name_lower_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='alias',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('full_name'), django.db.models.functions.text.Lower('short_name'), name='trades_alias_names_lower_uniq', violation_error_message='This alias already exists.'),
+        ),
+    ]
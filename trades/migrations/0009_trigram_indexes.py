@@ -0,0 +1,39 @@
+# Generated by Django 4.0.6 on 2026-10-18 12:20
+
+from django.db import migrations
+
+# (index name, table, column) for the name columns searched by similar_names().
+TRIGRAM_INDEXES = [
+    ('trades_item_name_trgm', 'trades_item', 'name'),
+    ('trades_alias_full_trgm', 'trades_alias', 'full_name'),
+    ('trades_alias_short_trgm', 'trades_alias', 'short_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Postgres only: other databases use the in-process trigram index instead."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0008_alias_item_lower_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.0.6 on 2026-10-18 11:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def build_rollups(apps, schema_editor):
+    """Seed DailyRollup from the stored transactions, one grouped aggregate query."""
+    Transaction = apps.get_model('trades', 'Transaction')
+    DailyRollup = apps.get_model('trades', 'DailyRollup')
+    sells = Q(trans_type='Sell')
+    rows = (
+        Transaction.objects.filter(user__isnull=False).order_by()
+        .values('user_id', 'item_id', 'date_of_holding')
+        .annotate(
+            trade_count=Count('id'),
+            buy_qty=Sum('quantity', filter=~sells),
+            buy_notional=Sum(F('price') * F('quantity'), filter=~sells),
+            sell_qty=Sum('quantity', filter=sells),
+            sell_notional=Sum(F('price') * F('quantity'), filter=sells),
+            realised_profit=Sum('realised_profit'),
+        )
+    )
+    DailyRollup.objects.bulk_create(
+        [
+            DailyRollup(
+                user_id=row['user_id'], item_id=row['item_id'], day=row['date_of_holding'],
+                trade_count=row['trade_count'],
+                buy_qty=row['buy_qty'] or 0, buy_notional=row['buy_notional'] or 0,
+                sell_qty=row['sell_qty'] or 0, sell_notional=row['sell_notional'] or 0,
+                realised_profit=row['realised_profit'] or 0,
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0009_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('buy_qty', models.FloatField(default=0.0)),
+                ('buy_notional', models.FloatField(default=0.0)),
+                ('sell_qty', models.FloatField(default=0.0)),
+                ('sell_notional', models.FloatField(default=0.0)),
+                ('realised_profit', models.FloatField(default=0.0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trades.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='trades_dailyrollup_user_day')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'item', 'day'), name='trades_dailyrollup_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.0.6 on 2026-10-18 12:16
+
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MONTH_FIELDS = ['january', 'february', 'march', 'april', 'may', 'june',
+                'july', 'august', 'september', 'october', 'november', 'december']
+
+
+def parse_existing_rows(apps, schema_editor):
+    """Parse every WealthData month once (same rules as trades.wealth.parse_value)."""
+    WealthData = apps.get_model('trades', 'WealthData')
+    WealthPoint = apps.get_model('trades', 'WealthPoint')
+    points = []
+    for record in WealthData.objects.iterator():
+        for month, field in enumerate(MONTH_FIELDS, start=1):
+            try:
+                value = Decimal((getattr(record, field) or '').replace(',', '').strip())
+            except InvalidOperation:
+                continue
+            if value.is_finite() and abs(value) < Decimal(10) ** 18:
+                points.append(WealthPoint(wealth_data_id=record.pk, account_name=record.account_name,
+                                          year=record.year, month=month, value=value.quantize(Decimal('0.01'))))
+    WealthPoint.objects.bulk_create(points, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0010_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WealthPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_name', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('wealth_data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points', to='trades.wealthdata')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account_name', 'year', 'month'], name='trades_wealthpoint_acct_year')],
+                'constraints': [models.UniqueConstraint(fields=('wealth_data', 'month'), name='trades_wealthpoint_uniq')],
+            },
+        ),
+        migrations.RunPython(parse_existing_rows, migrations.RunPython.noop),
+    ]
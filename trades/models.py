@@ -1,6 +1,7 @@
 # trades/models.py
 
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -13,6 +14,17 @@ class Alias(models.Model):
     image_path = models.CharField(max_length=300, blank=True)
     image_file = models.ImageField(upload_to='aliases/', blank=True, null=True)
 
+    # Names are matched case-insensitively, so index and constrain LOWER(...).
+    # The unique pair also serves full-name lookups and the A-Z filter.
+    class Meta:
+        indexes = [
+            models.Index(Lower('short_name'), name='trades_alias_short_lower_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('full_name'), Lower('short_name'), name='trades_alias_names_lower_uniq',
+                                    violation_error_message="This alias already exists."),
+        ]
+
     def __str__(self):
         return f"{self.short_name} -> {self.full_name}"
 
@@ -20,6 +32,11 @@ class Alias(models.Model):
 class Item(models.Model):
     name = models.CharField(max_length=200, unique=True)
 
+    class Meta:
+        indexes = [
+            models.Index(Lower('name'), name='trades_item_name_lower_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -51,6 +68,129 @@ class Transaction(models.Model):
         return f"{self.item.name} {self.trans_type} {self.quantity} @ {self.price}"
 
 
+class OpenLot(models.Model):
+    """
+    The unconsumed part of a buy transaction, in FIFO order per (user, item).
+    Kept up to date by the FIFO engine in fifo.py, so holdings and the cost
+    of the next sell are reads of this table instead of a history replay.
+    """
+    buy_transaction = models.OneToOneField(
+        Transaction, on_delete=models.CASCADE, primary_key=True, related_name='open_lot'
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    date_of_holding = models.DateField()
+    remaining_qty = models.FloatField()
+    price = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'item', 'date_of_holding', 'buy_transaction']),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} {self.remaining_qty} @ {self.price}"
+
+
+class TradeSummary(models.Model):
+    """Running totals over a set of trades, maintained by the FIFO engine."""
+    trade_count = models.PositiveIntegerField(default=0)
+    bought_qty = models.FloatField(default=0.0)
+    sold_qty = models.FloatField(default=0.0)
+    sold_notional = models.FloatField(default=0.0)  # sum of price * quantity over sells
+    realised_profit = models.FloatField(default=0.0)
+    last_trade_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def avg_sold_price(self):
+        """Quantity-weighted average sell price."""
+        return self.sold_notional / self.sold_qty if self.sold_qty else 0
+
+
+class Position(TradeSummary):
+    """
+    Per (user, item) summary backing the item panel on the index page.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item'], name='trades_position_user_item_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.item.name}: {self.bought_qty - self.sold_qty} held"
+
+
+class UserTradeTotals(TradeSummary):
+    """
+    Per-user summary over all items; realised_profit is the global realised profit.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='trade_totals')
+
+    def __str__(self):
+        return f"{self.user} realised {self.realised_profit}"
+
+
+class DailyRollup(models.Model):
+    """
+    One user's trades in one item on one day, summed.  Maintained by the FIFO
+    engine alongside Position, so charts scale with days rather than trades.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    day = models.DateField()
+    trade_count = models.PositiveIntegerField(default=0)
+    buy_qty = models.FloatField(default=0.0)
+    buy_notional = models.FloatField(default=0.0)  # sum of price * quantity over buys
+    sell_qty = models.FloatField(default=0.0)
+    sell_notional = models.FloatField(default=0.0)
+    realised_profit = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item', 'day'], name='trades_dailyrollup_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='trades_dailyrollup_user_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.item.name} {self.day}"
+
+
+class FifoRecalcRequest(models.Model):
+    """
+    A pending FIFO recalculation for one user, drained in the background.
+    Requests for the same user are merged into this single row, keeping the
+    earliest position that needs recomputing (all ``since_*`` empty = full
+    replay).  While a row exists the user's profit figures are stale.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='fifo_recalc_request')
+    since_date = models.DateField(null=True, blank=True)
+    since_type = models.CharField(max_length=4, blank=True)
+    since_id = models.BigIntegerField(null=True, blank=True)
+    requested_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def since(self):
+        """The fifo_position() tuple to recalculate from, or None for everything."""
+        if self.since_date is None:
+            return None
+        return (self.since_date, self.since_type, self.since_id)
+
+    @since.setter
+    def since(self, position):
+        self.since_date, self.since_type, self.since_id = position or (None, '', None)
+
+    def __str__(self):
+        return f"FIFO recalc for {self.user} since {self.since}"
+
+
 class AccumulationPrice(models.Model):
     item = models.OneToOneField(Item, on_delete=models.CASCADE)
     accumulation_price = models.FloatField(default=0.0)
@@ -96,6 +236,30 @@ class WealthData(models.Model):
         return f"{self.account_name} {self.year}"
 
 
+class WealthPoint(models.Model):
+    """
+    One month of a WealthData row as a number, so that wealth totals can be
+    summed in SQL.  Kept in step with its row by trades.wealth; blank or
+    unparseable months have no point.
+    """
+    wealth_data = models.ForeignKey(WealthData, on_delete=models.CASCADE, related_name='points')
+    account_name = models.CharField(max_length=100)
+    year = models.IntegerField()
+    month = models.PositiveSmallIntegerField()  # 1-12
+    value = models.DecimalField(max_digits=20, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wealth_data', 'month'], name='trades_wealthpoint_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['account_name', 'year', 'month'], name='trades_wealthpoint_acct_year'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_name} {self.year}-{self.month:02d}"
+
+
 class Watchlist(models.Model):
     BUY = 'Buy'
     SELL = 'Sell'
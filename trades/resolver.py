@@ -0,0 +1,325 @@
+# trades/resolver.py
+
+"""
+Item/alias name resolution from an in-process index.
+
+Search boxes and trade forms accept a short name, an alias full name or an
+item name, matched case-insensitively.  Rather than two or three ``iexact``
+queries per lookup, every worker keeps a case-folded dict of all aliases and
+items, built on first use.  Saving or deleting an Alias or Item stores a new
+version token in the 'versions' cache (settings.CACHES), which all workers
+share; a worker whose index was built under an older token rebuilds it on
+its next lookup.
+The same index answers typeahead prefix searches (suggest()) and, when the
+database is not Postgres, fuzzy "did you mean" searches (similar_names()).
+
+Bulk writes (QuerySet.update(), bulk_create()) send no signals: call
+invalidate() after them.
+"""
+
+import re
+import threading
+import uuid
+from bisect import bisect_left
+
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Alias, Item
+
+VERSION_CACHE = 'versions'
+VERSION_KEY = 'trades:name_index:version'
+
+ALIAS_FIELDS = ['id', 'full_name', 'short_name', 'image_path', 'image_file']
+ITEM_FIELDS = ['id', 'name']
+
+# pg_trgm's default similarity_threshold, so both search paths agree.
+SIMILARITY_THRESHOLD = 0.3
+
+_lock = threading.Lock()
+_index = None
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """The set of trigrams pg_trgm extracts from ``text`` (words padded with '  ' and ' ')."""
+    grams = set()
+    for word in _WORD_RE.findall(text.casefold()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to name, ranking by pg_trgm's similarity()
+    (shared trigrams / union of trigrams).  Postings are NumPy arrays so a
+    query is one bincount over the matching postings.
+    """
+
+    def __init__(self, names):
+        # Imported here: most workers never run a fuzzy search.
+        import numpy as np
+
+        # names: (searchable text, full name it stands for) pairs.
+        self.names = []
+        sizes = []
+        postings = {}
+        for text, full_name in names:
+            grams = trigrams(text)
+            if not grams:
+                continue
+            position = len(self.names)
+            self.names.append(full_name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.sizes = np.array(sizes, dtype=np.int32)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def search(self, query, limit, threshold=SIMILARITY_THRESHOLD):
+        """Up to ``limit`` distinct [(full_name, similarity)] with similarity >= threshold, best first."""
+        import numpy as np
+
+        query_grams = trigrams(query)
+        hits = [self.postings[gram] for gram in query_grams if gram in self.postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        similarity = shared / (len(query_grams) + self.sizes - shared)
+        candidates = np.flatnonzero(similarity >= threshold)
+        # Best first; several entries (item name, alias names) can stand for one item.
+        candidates = candidates[np.argsort(-similarity[candidates], kind='stable')]
+        results, seen = [], set()
+        for position in candidates:
+            name = self.names[position]
+            if name.casefold() not in seen:
+                seen.add(name.casefold())
+                results.append((name, float(similarity[position])))
+                if len(results) == limit:
+                    break
+        return results
+
+
+class NameIndex:
+    """Case-folded lookups over raw Alias/Item rows; first row (lowest id) wins, like .first()."""
+
+    def __init__(self, version, alias_rows, item_rows):
+        self.version = version
+        self.alias_by_short = {}
+        self.alias_by_full = {}
+        self.image_alias_by_full = {}
+        self.item_by_name = {}
+        for row in alias_rows:
+            _, full_name, short_name, _, image_file = row
+            self.alias_by_short.setdefault(short_name.casefold(), row)
+            self.alias_by_full.setdefault(full_name.casefold(), row)
+            if image_file:
+                self.image_alias_by_full.setdefault(full_name.casefold(), row)
+        for row in item_rows:
+            self.item_by_name.setdefault(row[1].casefold(), row)
+
+        # Typeahead: every item name, alias full name and alias short name as a
+        # sorted array of case-folded keys, searched by prefix with bisect.
+        # Alias full names are shown as the matching item's name when there is one.
+        entries = {(name.casefold(), name, '') for _, name in item_rows}
+        for _, full_name, short_name, _, _ in alias_rows:
+            full_name = self.item_by_name.get(full_name.casefold(), (None, full_name))[1]
+            entries.add((full_name.casefold(), full_name, ''))
+            if short_name:
+                entries.add((short_name.casefold(), full_name, short_name))
+        entries = sorted(entries)
+        self.suggest_keys = [key for key, _, _ in entries]
+        self.suggest_entries = [(full_name, short_name) for _, full_name, short_name in entries]
+        self._trigram_index = None
+
+    @property
+    def trigram_index(self):
+        """TrigramIndex over the same names, built on the first fuzzy search."""
+        if self._trigram_index is None:
+            self._trigram_index = TrigramIndex(
+                (key, full_name) for key, (full_name, _) in zip(self.suggest_keys, self.suggest_entries)
+            )
+        return self._trigram_index
+
+    def suggest(self, prefix, limit):
+        """Up to ``limit`` (full_name, short_name) pairs whose name or short name starts with ``prefix``."""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        results, seen = [], set()
+        position = bisect_left(self.suggest_keys, prefix)
+        while position < len(self.suggest_keys) and len(results) < limit:
+            if not self.suggest_keys[position].startswith(prefix):
+                break
+            full_name, short_name = self.suggest_entries[position]
+            if full_name.casefold() not in seen:
+                seen.add(full_name.casefold())
+                results.append((full_name, short_name))
+            position += 1
+        return results
+
+
+def _current_version():
+    cache = caches[VERSION_CACHE]
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # First use, or evicted: publish a token (another worker may win the race).
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_index():
+    """The process's NameIndex, rebuilt if another worker (or this one) changed aliases/items."""
+    global _index
+    version = _current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            alias_rows = Alias.objects.order_by('id').values_list(*ALIAS_FIELDS)
+            item_rows = Item.objects.order_by('id').values_list(*ITEM_FIELDS)
+            _index = NameIndex(version, list(alias_rows), list(item_rows))
+        return _index
+
+
+def invalidate():
+    """
+    Mark every worker's index stale; this process rebuilds on its next lookup.
+    Bumped again on commit: an index another worker built from the old rows
+    while the transaction was open must not survive under the intermediate
+    version.
+    """
+    def bump():
+        global _index
+        caches[VERSION_CACHE].set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        _index = None
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _alias(row):
+    return Alias.from_db('default', ALIAS_FIELDS, row) if row else None
+
+
+def _item(row):
+    return Item.from_db('default', ITEM_FIELDS, row) if row else None
+
+
+def find_alias(name):
+    """Alias whose short name, or failing that full name, matches ``name`` (case-insensitive)."""
+    index = get_index()
+    key = name.strip().casefold()
+    return _alias(index.alias_by_short.get(key) or index.alias_by_full.get(key))
+
+
+def find_item(name):
+    """Item called ``name`` (case-insensitive), or None."""
+    return _item(get_index().item_by_name.get(name.strip().casefold()))
+
+
+def alias_for_item(item_name, with_image=False):
+    """First alias whose full name is ``item_name``; with_image=True skips aliases without an image file."""
+    index = get_index()
+    lookup = index.image_alias_by_full if with_image else index.alias_by_full
+    return _alias(lookup.get(item_name.casefold()))
+
+
+def suggest(prefix, limit=10):
+    """
+    Autocomplete matches for ``prefix`` as dicts with the item's full name,
+    the alias short name that matched (if any) and the alias image URL.
+    """
+    index = get_index()
+    results = []
+    for full_name, short_name in index.suggest(prefix, limit):
+        image_alias = _alias(index.image_alias_by_full.get(full_name.casefold()))
+        results.append({
+            'name': full_name,
+            'short_name': short_name,
+            'image_url': image_alias.image_file.url if image_alias else None,
+        })
+    return results
+
+
+def similar_names(query, limit=5):
+    """
+    [(full_name, similarity)] for names resembling ``query``, best first,
+    matched against item names and alias full/short names.  Uses pg_trgm and
+    its GIN indexes on Postgres, the in-process TrigramIndex elsewhere.
+    """
+    if not query.strip():
+        return []
+    if connection.vendor == 'postgresql':
+        return _pg_similar_names(query, limit)
+    return get_index().trigram_index.search(query, limit)
+
+
+def _pg_similar_names(query, limit):
+    # Imported here: django.contrib.postgres needs psycopg2.
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models import F
+
+    # The `%` operator is what the gin_trgm_ops indexes serve.  Filtering with
+    # the lookup itself saves registering it on CharField (global state).
+    candidates = [
+        Item.objects.filter(TrigramSimilar(F('name'), query))
+        .annotate(full=F('name'), similarity=TrigramSimilarity('name', query)),
+        Alias.objects.filter(TrigramSimilar(F('full_name'), query))
+        .annotate(full=F('full_name'), similarity=TrigramSimilarity('full_name', query)),
+        Alias.objects.filter(TrigramSimilar(F('short_name'), query))
+        .annotate(full=F('full_name'), similarity=TrigramSimilarity('short_name', query)),
+    ]
+    rows = [qs.order_by().values_list('full', 'similarity') for qs in candidates]
+    best = {}
+    for full_name, similarity in rows[0].union(*rows[1:], all=True).order_by('-similarity')[:limit * 3]:
+        best.setdefault(full_name.casefold(), (full_name, similarity))
+    return list(best.values())[:limit]
+
+
+def resolve(name):
+    """
+    (alias, item) for a user-typed name: short name, then alias full name,
+    then item name.  Either may be None; item is looked up by the alias's
+    full name when an alias matched.
+    """
+    alias = find_alias(name)
+    item = find_item(alias.full_name if alias else name)
+    return alias, item
+
+
+def resolve_or_create_item(name):
+    """
+    The Item a trade entered as ``name`` belongs to, created if it does not
+    exist yet.  An index miss is checked against the database (any case)
+    before creating: the item may be newer than this worker's index.
+    """
+    alias, item = resolve(name)
+    if item is not None:
+        return item
+    name = alias.full_name if alias else name.strip()
+    item = (Item.objects.annotate(name_lower=Lower('name'))
+            .filter(name_lower=name.lower()).order_by('id').first())
+    if item is None:
+        try:
+            with transaction.atomic():
+                item = Item.objects.create(name=name)
+        except IntegrityError:
+            # Created by a concurrent request in the meantime.
+            item = Item.objects.get(name=name)
+    return item
+
+
+@receiver(post_save, sender=Alias)
+@receiver(post_delete, sender=Alias)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def _names_changed(sender, **kwargs):
+    invalidate()
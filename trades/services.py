@@ -0,0 +1,43 @@
+# trades/services.py
+
+"""Read-side helpers shared by the views and the chart endpoints."""
+
+from django.db.models import F, OuterRef, Subquery, Sum
+
+from .models import OpenLot, Position
+
+# get_item_stats() result for an item the user never traded.
+EMPTY_ITEM_STATS = {
+    'trade_count': 0, 'bought_qty': 0, 'total_sold': 0, 'remaining_qty': 0,
+    'average_cost': 0, 'avg_sold_price': 0, 'item_profit': 0, 'last_trade_date': None,
+}
+
+
+def get_item_stats(user, item):
+    """
+    Summary figures for ``user``'s trades in ``item`` in a single query:
+    the Position row plus the open quantity/cost from the OpenLot ledger
+    (as subqueries).  avg_sold_price is quantity-weighted.
+    """
+    open_lots = OpenLot.objects.filter(user=OuterRef('user'), item=OuterRef('item')).order_by().values('item')
+    row = (
+        Position.objects.filter(user=user, item=item)
+        .annotate(
+            open_qty=Subquery(open_lots.annotate(total=Sum('remaining_qty')).values('total')),
+            open_cost=Subquery(open_lots.annotate(total=Sum(F('remaining_qty') * F('price'))).values('total')),
+        )
+        .first()
+    )
+    if row is None:
+        return dict(EMPTY_ITEM_STATS)
+    remaining_qty = row.open_qty or 0
+    return {
+        'trade_count': row.trade_count,
+        'bought_qty': row.bought_qty,
+        'total_sold': row.sold_qty,
+        'remaining_qty': remaining_qty,
+        'average_cost': (row.open_cost / remaining_qty) if remaining_qty else 0,
+        'avg_sold_price': row.avg_sold_price,
+        'item_profit': row.realised_profit,
+        'last_trade_date': row.last_trade_date,
+    }
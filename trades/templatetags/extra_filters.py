@@ -14,3 +14,15 @@ def blank_zero(value):
     except (ValueError, TypeError):
         pass
     return value
+
+@register.filter
+def percent(value, digits=1):
+    """
+    Formats a fraction as a percentage with a sign ("+5.0%" for 0.05); empty for None.
+    """
+    if value is None:
+        return ""
+    try:
+        return f"{float(value) * 100:+.{int(digits)}f}%"
+    except (ValueError, TypeError):
+        return ""
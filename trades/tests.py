@@ -1,3 +1,927 @@
-from django.test import TestCase
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.functions import Lower
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import chart_cache, chart_data, chart_formats, charts, fifo, resolver, wealth, wealth_analytics
+from .forms import AliasForm
+from .fifo import (
+    calculate_fifo_for_all_users, calculate_fifo_for_new_trade, calculate_fifo_for_user, fifo_position,
+    open_position, preview_sell_profit, process_fifo_recalc_requests, rebuild_daily_rollups, request_fifo_recalc,
+    _fifo_match,
+)
+from .fifo_kernel import fifo_kernel
+from .models import (
+    Alias, DailyRollup, FifoRecalcRequest, Item, OpenLot, Position, Transaction, UserTradeTotals, WealthData,
+    WealthPoint,
+)
+from .services import get_item_stats
+from .views import transaction_page
+
+
+def make_history(user, items, count, seed=0):
+    """Create ``count`` random buys/sells for ``user`` spread over ``items``."""
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    for _ in range(count):
+        Transaction.objects.create(
+            user=user,
+            item=rng.choice(items),
+            trans_type=rng.choice(['Buy', 'Buy', 'Sell']),
+            price=rng.randint(1, 500) * 1_000_000 / 7,
+            quantity=rng.randint(1, 40) / 3,
+            date_of_holding=start + timedelta(days=rng.randint(0, 60)),
+        )
+
+
+def profit_snapshot(user):
+    return list(
+        Transaction.objects.filter(user=user)
+        .order_by('id')
+        .values_list('id', 'realised_profit', 'cumulative_profit')
+    )
+
+
+def ledger_snapshot(user):
+    return list(
+        OpenLot.objects.filter(user=user)
+        .order_by('buy_transaction_id')
+        .values_list('buy_transaction_id', 'item_id', 'remaining_qty', 'price', 'date_of_holding')
+    )
+
+
+def summary_snapshot(user):
+    fields = ['trade_count', 'bought_qty', 'sold_qty', 'sold_notional', 'realised_profit', 'last_trade_date']
+    return (
+        list(Position.objects.filter(user=user).order_by('item_id').values_list('item_id', *fields)),
+        list(UserTradeTotals.objects.filter(user=user).values_list(*fields)),
+    )
+
+
+def rollup_snapshot(user):
+    fields = ['trade_count', 'buy_qty', 'buy_notional', 'sell_qty', 'sell_notional', 'realised_profit']
+    return [
+        tuple(round(value, 4) if isinstance(value, float) else value for value in row)
+        for row in DailyRollup.objects.filter(user=user).order_by('item_id', 'day').values_list('item_id', 'day', *fields)
+    ]
+
+
+class IncrementalFifoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.items = [Item.objects.create(name=f"Item {i}") for i in range(3)]
+        make_history(self.user, self.items, 120)
+        calculate_fifo_for_user(self.user)
+
+    def assert_matches_full_replay(self):
+        incremental = profit_snapshot(self.user), ledger_snapshot(self.user), rollup_snapshot(self.user)
+        OpenLot.objects.filter(user=self.user).delete()
+        DailyRollup.objects.filter(user=self.user).delete()
+        calculate_fifo_for_user(self.user)
+        self.assertEqual(incremental, (profit_snapshot(self.user), ledger_snapshot(self.user), rollup_snapshot(self.user)))
+        rebuild_daily_rollups()
+        self.assertEqual(incremental[2], rollup_snapshot(self.user))
+
+    def test_backdated_add(self):
+        trans = Transaction.objects.create(
+            user=self.user, item=self.items[0], trans_type='Sell',
+            price=90_000_000, quantity=5, date_of_holding=date(2023, 1, 10),
+        )
+        calculate_fifo_for_user(self.user, since=fifo_position(trans))
+        self.assert_matches_full_replay()
+
+    def test_edit_moving_trade_later(self):
+        trans = Transaction.objects.filter(user=self.user, trans_type='Buy').order_by('date_of_holding').first()
+        original = fifo_position(trans)
+        trans.date_of_holding = date(2023, 2, 20)
+        trans.quantity += 7
+        trans.save()
+        calculate_fifo_for_user(self.user, since=min(original, fifo_position(trans)))
+        self.assert_matches_full_replay()
+
+    def test_delete(self):
+        trans = Transaction.objects.filter(user=self.user).order_by('date_of_holding', 'id')[30]
+        position = fifo_position(trans)
+        trans.delete()
+        calculate_fifo_for_user(self.user, since=position)
+        self.assert_matches_full_replay()
+
+    def test_only_rows_from_position_are_written(self):
+        trans = Transaction.objects.filter(user=self.user).order_by('-date_of_holding', '-trans_type', '-id').first()
+        Transaction.objects.filter(user=self.user).exclude(id=trans.id).update(realised_profit=-1)
+        calculate_fifo_for_user(self.user, since=fifo_position(trans))
+        self.assertEqual(
+            Transaction.objects.filter(user=self.user, realised_profit=-1).count(),
+            Transaction.objects.filter(user=self.user).count() - 1,
+        )
+
+
+@override_settings(FIFO_RECALC_ASYNC=False)
+class OpenLotLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.item = Item.objects.create(name="Item")
+
+    def trade(self, trans_type, quantity, price, day):
+        trans = Transaction.objects.create(
+            user=self.user, item=self.item, trans_type=trans_type,
+            price=price, quantity=quantity, date_of_holding=date(2024, 1, day),
+        )
+        calculate_fifo_for_new_trade(trans)
+        trans.refresh_from_db()
+        return trans
+
+    def test_appended_trades_use_the_ledger(self):
+        self.trade('Buy', 10, 100, 1)
+        second_buy = self.trade('Buy', 5, 200, 2)
+        self.assertEqual(open_position(self.user, self.item), {'quantity': 15, 'average_cost': 2000 / 15})
+        self.assertAlmostEqual(preview_sell_profit(self.user, self.item, 12, 300), 12 * 300 * 0.98 - 1400)
+
+        sell = self.trade('Sell', 12, 300, 3)
+        self.assertAlmostEqual(sell.realised_profit, 12 * 300 * 0.98 - 1400)
+        self.assertEqual(ledger_snapshot(self.user), [(second_buy.id, self.item.id, 3, 200, date(2024, 1, 2))])
+
+        snapshot = profit_snapshot(self.user), ledger_snapshot(self.user), summary_snapshot(self.user)
+        OpenLot.objects.all().delete()
+        Position.objects.all().delete()
+        calculate_fifo_for_user(self.user)
+        self.assertEqual(snapshot, (profit_snapshot(self.user), ledger_snapshot(self.user), summary_snapshot(self.user)))
+        rollups = rollup_snapshot(self.user)
+        self.assertEqual(len(rollups), 3)
+        rebuild_daily_rollups()
+        self.assertEqual(rollups, rollup_snapshot(self.user))
+
+        position = Position.objects.get(user=self.user, item=self.item)
+        self.assertEqual((position.bought_qty, position.sold_qty, position.avg_sold_price), (15, 12, 300))
+
+    def test_global_profit_is_the_final_total(self):
+        self.trade('Buy', 10, 100, 1)
+        self.trade('Sell', 5, 300, 2)   # +970
+        self.trade('Sell', 5, 10, 3)    # -451
+        self.client.force_login(self.user)
+        response = self.client.get('/')
+        self.assertEqual(response.context['global_realised_profit'], 970 - 451)
+
+    def test_item_stats_take_one_query(self):
+        self.trade('Buy', 10, 100, 1)
+        self.trade('Sell', 2, 300, 2)
+        self.trade('Sell', 6, 200, 3)
+        with self.assertNumQueries(1):
+            stats = get_item_stats(self.user, self.item)
+        self.assertEqual(stats['total_sold'], 8)
+        self.assertEqual(stats['remaining_qty'], 2)
+        self.assertEqual(stats['average_cost'], 100)
+        self.assertEqual(stats['avg_sold_price'], (2 * 300 + 6 * 200) / 8)
+        self.assertAlmostEqual(stats['item_profit'], (2 * 300 + 6 * 200) * 0.98 - 800)
+        other = Item.objects.create(name="Other")
+        with self.assertNumQueries(1):
+            self.assertEqual(get_item_stats(self.user, other)['trade_count'], 0)
+
+    def test_backdated_trade_replays(self):
+        self.trade('Buy', 10, 100, 2)
+        sell = self.trade('Sell', 10, 300, 3)
+        self.trade('Buy', 10, 50, 1)
+        sell.refresh_from_db()
+        self.assertAlmostEqual(sell.realised_profit, 10 * 300 * 0.98 - 500)
+        self.assertEqual(open_position(self.user, self.item)['average_cost'], 100)
+
+
+class AllUsersFifoTests(TestCase):
+    def test_failing_user_does_not_abort_the_rest(self):
+        users = [User.objects.create_user(username=f"trader{i}", password='pw') for i in range(3)]
+        item = Item.objects.create(name="Item")
+        for user in users:
+            Transaction.objects.create(user=user, item=item, trans_type='Buy', price=100, quantity=5,
+                                       date_of_holding=date(2024, 1, 1))
+            Transaction.objects.create(user=user, item=item, trans_type='Sell', price=200, quantity=5,
+                                       date_of_holding=date(2024, 1, 2))
+        real = calculate_fifo_for_user
+
+        def flaky(user, **kwargs):
+            if user == users[1]:
+                raise ValueError("boom")
+            return real(user, **kwargs)
+
+        reported = []
+        with mock.patch('trades.fifo.calculate_fifo_for_user', side_effect=flaky), self.assertLogs('trades.fifo', 'ERROR'):
+            failures = calculate_fifo_for_all_users(progress=lambda *args: reported.append(args))
+        self.assertEqual(failures, [(users[1].id, "ValueError: boom")])
+        self.assertEqual([r[0] for r in reported], [1, 2, 3])
+        self.assertEqual(sum(r[3] for r in reported), 6)
+        profits = dict(Transaction.objects.filter(trans_type='Sell').values_list('user_id', 'realised_profit'))
+        self.assertEqual(profits, {users[0].id: 480, users[1].id: 0, users[2].id: 480})
+
+    def test_crashed_worker_does_not_abort_the_rest(self):
+        users = [User.objects.create_user(username=f"trader{i}", password='pw') for i in range(3)]
+        item = Item.objects.create(name="Item")
+        for user in users:
+            Transaction.objects.create(user=user, item=item, trans_type='Buy', price=100, quantity=5,
+                                       date_of_holding=date(2024, 1, 1))
+            Transaction.objects.create(user=user, item=item, trans_type='Sell', price=200, quantity=5,
+                                       date_of_holding=date(2024, 1, 2))
+
+        class InlinePool:
+            """ProcessPoolExecutor stand-in running in this process; users[1]'s worker dies."""
+            def __init__(self, max_workers, initializer):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def submit(self, fn, user_id):
+                future = Future()
+                if user_id == users[1].id:
+                    future.set_exception(BrokenProcessPool("worker died"))
+                else:
+                    future.set_result(fn(user_id))
+                return future
+
+        with mock.patch('trades.fifo.ProcessPoolExecutor', InlinePool), \
+                mock.patch.object(fifo.connections, 'close_all'), self.assertLogs('trades.fifo', 'ERROR'):
+            failures = calculate_fifo_for_all_users(workers=2)
+        self.assertEqual(failures, [(users[1].id, "BrokenProcessPool: worker died")])
+        profits = dict(Transaction.objects.filter(trans_type='Sell').values_list('user_id', 'realised_profit'))
+        self.assertEqual(profits, {users[0].id: 480, users[1].id: 0, users[2].id: 480})
+
+
+class FifoKernelTests(SimpleTestCase):
+    def reference(self, item_ids, is_sell, quantities, prices):
+        """The row-by-row loop: (realised, cumulative, remaining) lists."""
+        purchase_lots = {}
+        realised, cumulative, total = [], [], 0.0
+        for i, row in enumerate(zip(item_ids, is_sell, quantities, prices)):
+            item_id, sell, quantity, price = row
+            realised.append(_fifo_match(purchase_lots, item_id, 'Sell' if sell else 'Buy', quantity, price, i))
+            total += realised[-1]
+            cumulative.append(total)
+        remaining = [0.0] * len(item_ids)
+        for lots in purchase_lots.values():
+            for qty, _, i, _ in lots:
+                remaining[i] = qty
+        return realised, cumulative, remaining
+
+    def test_matches_reference_loop(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            size = rng.randint(0, 120)
+            item_ids = [rng.randint(1, 4) for _ in range(size)]
+            is_sell = [rng.random() < 0.4 for _ in range(size)]
+            quantities = [rng.randint(1, 40) / 3 for _ in range(size)]
+            prices = [rng.randint(1, 500) * 1_000_000 / 7 for _ in range(size)]
+            result = fifo_kernel(item_ids, is_sell, quantities, prices)
+            expected = self.reference(item_ids, is_sell, quantities, prices)
+            for got, want in zip(result, expected):
+                for g, w in zip(got, want):
+                    # Amounts are in coins; the cumulative sums may differ in the last bits.
+                    self.assertAlmostEqual(g, w, delta=max(1e-3, 1e-9 * abs(w)))
+
+    def test_order_permutation_and_oversold(self):
+        # Given out of order: sell 15 (only 10 bought so far), then buy 5 that stays open.
+        result = fifo_kernel([7, 7, 7], [True, False, False], [15, 10, 5], [300, 100, 200], order=[1, 0, 2])
+        self.assertEqual(result.realised.tolist(), [10 * 300 * 0.98 - 1000, 0, 0])
+        self.assertEqual(result.cumulative.tolist(), [1940, 0, 1940])
+        self.assertEqual(result.remaining.tolist(), [0, 0, 5])
+
+
+@override_settings(FIFO_RECALC_ASYNC=True)
+class FifoRecalcQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.item = Item.objects.create(name="Item")
+        self.buy = Transaction.objects.create(user=self.user, item=self.item, trans_type='Buy', price=100,
+                                              quantity=10, date_of_holding=date(2024, 1, 1))
+        self.sell = Transaction.objects.create(user=self.user, item=self.item, trans_type='Sell', price=200,
+                                               quantity=10, date_of_holding=date(2024, 1, 5))
+
+    def test_requests_for_a_user_are_merged(self):
+        request_fifo_recalc(self.user, since=fifo_position(self.sell))
+        request_fifo_recalc(self.user, since=fifo_position(self.buy))
+        request_fifo_recalc(self.user, since=fifo_position(self.sell))
+        self.assertEqual(FifoRecalcRequest.objects.get().since, fifo_position(self.buy))
+        request_fifo_recalc(self.user)
+        self.assertIsNone(FifoRecalcRequest.objects.get().since)
+
+        self.assertEqual(process_fifo_recalc_requests(), 1)
+        self.assertFalse(FifoRecalcRequest.objects.exists())
+        self.sell.refresh_from_db()
+        self.assertEqual(self.sell.realised_profit, 10 * 200 * 0.98 - 1000)
+
+    @override_settings(FIFO_RECALC_DELAY=0, FIFO_RECALC_POLL_INTERVAL=5)
+    def test_worker_polls_without_a_wakeup(self):
+        class Stop(Exception):
+            pass
+
+        with mock.patch.object(fifo._fifo_worker_wakeup, 'wait', side_effect=[False, Stop()]) as wait, \
+                mock.patch('trades.fifo.process_fifo_recalc_requests') as drain, \
+                mock.patch('trades.fifo.close_old_connections'):
+            with self.assertRaises(Stop):
+                fifo._fifo_worker_loop()
+        wait.assert_called_with(timeout=5)
+        drain.assert_called_once_with()
+
+    def test_new_trade_waits_behind_a_pending_request(self):
+        request_fifo_recalc(self.user, since=fifo_position(self.buy))
+        later = Transaction.objects.create(user=self.user, item=self.item, trans_type='Buy', price=100,
+                                           quantity=1, date_of_holding=date(2024, 2, 1))
+        calculate_fifo_for_new_trade(later)
+        self.assertFalse(OpenLot.objects.exists())
+        self.assertEqual(FifoRecalcRequest.objects.get().since, fifo_position(self.buy))
+
+    def test_index_shows_stale_profit(self):
+        self.client.force_login(self.user)
+        request_fifo_recalc(self.user)
+        self.assertContains(self.client.get('/'), 'being recalculated')
+        process_fifo_recalc_requests()
+        self.assertNotContains(self.client.get('/'), 'being recalculated')
+
+
+@override_settings(FIFO_RECALC_ASYNC=False, TRANSACTIONS_PAGE_SIZE=5)
+class TransactionPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.items = [Item.objects.create(name=f"Item {i}") for i in range(3)]
+        self.client.force_login(self.user)
+
+    def test_pages_cover_the_history_newest_first(self):
+        make_history(self.user, self.items, 23)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = transaction_page(self.user, cursor)
+            seen.extend(t.id for t in rows)
+            if not cursor:
+                break
+        expected = Transaction.objects.filter(user=self.user).order_by('-date_of_holding', '-id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
+
+    def test_index_query_count_does_not_grow_with_history(self):
+        make_history(self.user, self.items, 6)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/')
+        make_history(self.user, self.items, 60, seed=1)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/')
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.context['all_transactions']), 5)
+
+    def test_rows_fragment_returns_next_cursor(self):
+        make_history(self.user, self.items, 7)
+        _, cursor = transaction_page(self.user)
+        response = self.client.get('/transactions/rows/', {'cursor': cursor})
+        self.assertEqual(response['X-Next-Cursor'], '')
+        self.assertEqual(response.content.count(b'<tr>'), 2)
+
+
+class ResolverTests(TestCase):
+    def setUp(self):
+        self.item = Item.objects.create(name="Twisted Bow")
+        self.alias = Alias.objects.create(full_name="twisted bow", short_name="Tbow")
+
+    def test_lookup_chain(self):
+        self.assertEqual(resolver.resolve("TBOW"), (self.alias, self.item))
+        self.assertEqual(resolver.resolve(" Twisted BOW "), (self.alias, self.item))
+        self.assertEqual(resolver.resolve("nothing"), (None, None))
+        plain = Item.objects.create(name="Abyssal Whip")
+        self.assertEqual(resolver.resolve("abyssal whip"), (None, plain))
+
+    def test_warm_lookups_take_no_queries(self):
+        resolver.resolve("tbow")
+        with self.assertNumQueries(0):
+            alias, item = resolver.resolve("tbow")
+            resolver.alias_for_item(item.name)
+        self.assertFalse(item._state.adding)
+
+    def test_saves_and_deletes_invalidate(self):
+        resolver.resolve("tbow")
+        self.alias.short_name = "bow"
+        self.alias.save()
+        self.assertEqual(resolver.resolve("tbow"), (None, None))
+        self.assertEqual(resolver.resolve("bow"), (self.alias, self.item))
+        self.alias.delete()
+        self.assertEqual(resolver.resolve("bow"), (None, None))
+
+    def test_invalidated_again_on_commit(self):
+        resolver.resolve("tbow")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.alias.short_name = "bow"
+            self.alias.save()
+            # Another worker rebuilds from the rows it sees before the commit.
+            version = caches[resolver.VERSION_CACHE].get(resolver.VERSION_KEY)
+            resolver.get_index()
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(caches[resolver.VERSION_CACHE].get(resolver.VERSION_KEY), version)
+        self.assertIsNone(resolver._index)
+
+    def test_other_worker_change_is_seen(self):
+        resolver.resolve("tbow")
+        # Another process stored a new version token in the shared cache.
+        Item.objects.filter(pk=self.item.pk).update(name="Renamed")
+        caches[resolver.VERSION_CACHE].set(resolver.VERSION_KEY, "other-worker")
+        self.assertEqual(resolver.find_item("renamed"), self.item)
+
+    def test_version_is_shared_between_processes(self):
+        before = resolver._current_version()
+        subprocess.run([sys.executable, '-c', 'import django; django.setup(); '
+                        'from trades import resolver; resolver.invalidate()'], check=True)
+        self.assertNotEqual(resolver._current_version(), before)
+
+    def test_stale_index_does_not_duplicate_items(self):
+        resolver.resolve("tbow")
+        # Added by another worker whose version bump this one missed.
+        claws = Item.objects.bulk_create([Item(name="Dragon Claws")])[0]
+        self.assertEqual(resolver.find_item("dragon claws"), None)
+        self.assertEqual(resolver.resolve_or_create_item("Dragon Claws").pk, claws.pk)
+        self.assertEqual(resolver.resolve_or_create_item("DRAGON claws").pk, claws.pk)
+        self.assertEqual(Item.objects.filter(name__iexact="dragon claws").count(), 1)
+
+    def test_suggestions_by_prefix(self):
+        Item.objects.create(name="Twisted Buckler")
+        Alias.objects.create(full_name="Tumeken's Shadow", short_name="shadow")
+        names = [r['name'] for r in resolver.suggest("tw")]
+        self.assertEqual(names, ["Twisted Bow", "Twisted Buckler"])
+        self.assertEqual(resolver.suggest("tw", limit=1)[0]['name'], "Twisted Bow")
+        self.assertEqual(resolver.suggest("SHA")[0], {
+            'name': "Tumeken's Shadow", 'short_name': "shadow", 'image_url': None,
+        })
+        self.assertEqual(resolver.suggest("  "), [])
+
+    def test_suggest_endpoint_takes_no_queries(self):
+        self.client.force_login(User.objects.create_user(username='trader', password='pw'))
+        self.client.get('/items/suggest/', {'q': 't'})
+        with self.assertNumQueries(2):  # session + user; nothing for the names
+            response = self.client.get('/items/suggest/', {'q': 'tb', 'limit': 5})
+        self.assertEqual(response.json()['results'][0]['short_name'], "Tbow")
+
+    def test_trigram_similarity_matches_pg_trgm(self):
+        # similarity('word', 'two words') from the pg_trgm documentation.
+        index = resolver.TrigramIndex([("two words", "Two Words")])
+        [(name, similarity)] = index.search("word", 5)
+        self.assertEqual(name, "Two Words")
+        self.assertAlmostEqual(similarity, 4 / 11)
+
+    def test_search_suggests_similar_names(self):
+        self.client.force_login(User.objects.create_user(username='trader', password='pw'))
+        Item.objects.create(name="Dragon Claws")
+        self.assertEqual([n for n, _ in resolver.similar_names("twistd bow")], ["Twisted Bow"])
+        self.assertEqual([n for n, _ in resolver.similar_names("dragon claw")], ["Dragon Claws"])
+        response = self.client.get('/', {'search': 'twisted bw'})
+        self.assertEqual(response.context['did_you_mean'], ["Twisted Bow"])
+        self.assertContains(response, 'Did you mean')
+
+    def test_form_creates_item_from_alias(self):
+        Alias.objects.create(full_name="Scythe of Vitur", short_name="scy")
+        item = resolver.resolve_or_create_item("SCY")
+        self.assertEqual(item.name, "Scythe of Vitur")
+        self.assertEqual(resolver.resolve_or_create_item("scythe of vitur"), item)
+
+    def test_csv_import_updates_case_variant_alias(self):
+        with tempfile.TemporaryDirectory() as csv_dir:
+            with open(os.path.join(csv_dir, 'item_aliases.csv'), 'w', encoding='utf-8') as f:
+                f.write("FullName,ShortName,ImagePath\nTWISTED BOW,tbow,bow.png\nScythe of Vitur,scy,\n")
+            with CaptureQueriesContext(connection) as queries:
+                call_command('import_legacy_csv', csvdir=csv_dir, stdout=io.StringIO())
+        # iexact would compile to UPPER(...) on PostgreSQL, which the LOWER(...) index can't serve.
+        lookups = [q['sql'] for q in queries.captured_queries if 'FROM "trades_alias"' in q['sql']]
+        self.assertTrue(lookups)
+        self.assertTrue(all('LOWER(' in sql and 'LIKE' not in sql for sql in lookups))
+        self.alias.refresh_from_db()
+        self.assertEqual((self.alias.full_name, self.alias.image_path), ("twisted bow", "bow.png"))
+        self.assertEqual(Alias.objects.count(), 2)
+
+
+class NameIndexPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Item.objects.bulk_create([Item(name=f"Item {i:05d}") for i in range(5000)])
+        Alias.objects.bulk_create(
+            [Alias(full_name=f"Item {i:05d}", short_name=f"i{i}") for i in range(5000)]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assert_uses_index(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_lowercase_lookups_use_functional_indexes(self):
+        items = Item.objects.annotate(name_lower=Lower('name')).filter(name_lower='item 01234')
+        self.assert_uses_index(items, 'trades_item_name_lower_idx')
+        aliases = Alias.objects.annotate(short_lower=Lower('short_name')).filter(short_lower='i1234')
+        self.assert_uses_index(aliases, 'trades_alias_short_lower_idx')
+
+    def test_letter_filter_uses_the_pair_index(self):
+        aliases = (Alias.objects.annotate(full_name_lower=Lower('full_name'))
+                   .filter(full_name_lower__gte='i', full_name_lower__lt='j'))
+        self.assert_uses_index(aliases, 'trades_alias_names_lower_uniq')
+
+    def test_duplicate_alias_is_a_form_error(self):
+        form = AliasForm({'full_name': 'ITEM 00001', 'short_name': 'I1'})
+        self.assertFalse(form.is_valid() and form.save())
+        self.assertEqual(form.non_field_errors(), ["This alias already exists."])
+        self.assertEqual(Alias.objects.filter(short_name__iexact='i1').count(), 1)
+
+
+@override_settings(FIFO_RECALC_ASYNC=False)
+class ChartCacheTests(TestCase):
+    def setUp(self):
+        chart_cache.local.clear()
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.item = Item.objects.create(name="Item")
+        self.client.force_login(self.user)
+        self.client.post('/', {'add_transaction': '1', 'item_name': 'Item', 'trans_type': 'Buy',
+                               'price': 1, 'quantity': 10, 'date_of_holding': '2024-01-01'})
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get('/charts/item-profit/', {'search': 'item', 'timeframe': 'Monthly'})
+        self.assertEqual(first['X-Chart-Cache'], 'miss')
+        with self.assertNumQueries(2):  # session + user
+            second = self.client.get('/charts/item-profit/', {'search': 'ITEM', 'timeframe': 'Monthly'})
+        self.assertEqual(second['X-Chart-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        other = self.client.get('/charts/item-profit/', {'search': 'item', 'timeframe': 'Yearly'})
+        self.assertEqual(other['X-Chart-Cache'], 'miss')
+
+    def test_new_trade_retires_cached_charts(self):
+        self.client.get('/charts/global-profit/')
+        self.client.post('/', {'add_transaction': '1', 'item_name': 'Item', 'trans_type': 'Sell',
+                               'price': 2, 'quantity': 5, 'date_of_holding': '2024-01-02'})
+        self.assertEqual(self.client.get('/charts/global-profit/')['X-Chart-Cache'], 'miss')
+        self.assertEqual(self.client.get('/charts/global-profit/')['X-Chart-Cache'], 'hit')
+
+    def test_bulk_recalculation_retires_cached_charts(self):
+        self.client.get('/charts/global-profit/')
+        Transaction.objects.filter(user=self.user).update(cumulative_profit=123.0)
+        calculate_fifo_for_user(self.user)
+        self.assertEqual(self.client.get('/charts/global-profit/')['X-Chart-Cache'], 'miss')
+
+    def test_bump_in_another_process_retires_cached_charts(self):
+        self.client.get('/charts/global-profit/')
+        # e.g. process_fifo_queue or a recalculate_fifo pool child.
+        subprocess.run([sys.executable, '-c', 'import django; django.setup(); from trades import chart_cache; '
+                        f'chart_cache.bump_data_version("transactions", {self.user.pk})'], check=True)
+        self.assertEqual(self.client.get('/charts/global-profit/')['X-Chart-Cache'], 'miss')
+
+    @override_settings(FIFO_RECALC_ASYNC=True)
+    def test_rollup_only_recalculation_retires_cached_charts(self):
+        buy = Transaction.objects.get(user=self.user)
+        self.client.post('/', {'update_transaction': '1', 'transaction_id': buy.id, 'item_name': 'Item',
+                               'trans_type': 'Buy', 'price': 5, 'quantity': 10, 'date_of_holding': '2024-01-01'})
+        # Requested before the queued recalculation ran: rendered from the old rollups.
+        stale = self.client.get('/charts/item-dashboard/', {'search': 'item'})
+        self.assertEqual(stale['X-Chart-Cache'], 'miss')
+        self.assertEqual(process_fifo_recalc_requests(), 1)
+        fresh = self.client.get('/charts/item-dashboard/', {'search': 'item'})
+        self.assertEqual(fresh['X-Chart-Cache'], 'miss')
+        self.assertNotEqual(fresh.content, stale.content)
+
+    def test_local_tier_is_byte_capped_lru(self):
+        lru = chart_cache.LocalLRU(max_bytes=10)
+        lru.set('a', b'1234')
+        lru.set('b', b'1234')
+        lru.get('a')
+        lru.set('c', b'1234')
+        self.assertEqual(list(lru.entries), ['a', 'c'])
+        self.assertEqual(lru.counters['evictions'], 1)
+
+
+@override_settings(FIFO_RECALC_ASYNC=False, CHART_WARMUP=True, CHART_WARMUP_WORKERS=0,
+                   CHART_WARMUP_TIMEFRAMES=['Daily', 'Monthly'], CHART_WARMUP_FORMATS=['png'])
+class ChartWarmupTests(TestCase):
+    def setUp(self):
+        chart_cache.local.clear()
+        resolver.invalidate()
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.client.force_login(self.user)
+
+    def add_trade(self, name, trans_type, price, day):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/', {'add_transaction': '1', 'item_name': name, 'trans_type': trans_type,
+                                   'price': price, 'quantity': 10, 'date_of_holding': day})
+
+    def cache_status(self, url, **params):
+        return self.client.get(url, params)['X-Chart-Cache']
+
+    def test_new_trade_prerenders_the_redirect_target_charts(self):
+        self.add_trade('Item', 'Buy', 1, '2024-01-05')
+        for timeframe in ('Daily', 'Monthly'):
+            self.assertEqual(self.cache_status('/charts/item-dashboard/', search='Item', timeframe=timeframe), 'hit')
+            self.assertEqual(self.cache_status('/charts/global-profit/', timeframe=timeframe), 'hit')
+        self.assertEqual(self.cache_status('/charts/global-profit/', timeframe='Yearly'), 'miss')
+
+    def test_recalculation_prerenders_the_changed_items(self):
+        self.add_trade('Item', 'Buy', 1, '2024-01-05')
+        self.add_trade('Other', 'Buy', 1, '2024-01-05')
+        self.add_trade('Item', 'Buy', 2, '2024-01-01')  # back-dated: full recalculation
+        self.assertEqual(self.cache_status('/charts/item-dashboard/', search='Item', timeframe='Daily'), 'hit')
+        self.assertEqual(self.cache_status('/charts/global-profit/', timeframe='Daily'), 'hit')
+
+    def test_disabled_and_item_cap(self):
+        with self.settings(CHART_WARMUP=False):
+            self.add_trade('Item', 'Buy', 1, '2024-01-05')
+        self.assertEqual(self.cache_status('/charts/item-dashboard/', search='Item', timeframe='Daily'), 'miss')
+        with self.settings(CHART_WARMUP_MAX_ITEMS=0):
+            self.add_trade('Item', 'Buy', 1, '2024-01-06')
+        self.assertEqual(self.cache_status('/charts/item-dashboard/', search='Item', timeframe='Daily'), 'miss')
+        self.assertEqual(self.cache_status('/charts/global-profit/', timeframe='Daily'), 'hit')
+
+
+class ChartFormatTests(SimpleTestCase):
+    CHROME_ACCEPT = 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
+
+    def spec(self, accept='', **params):
+        request = RequestFactory().get('/charts/global-profit/', params, HTTP_ACCEPT=accept)
+        return chart_formats.image_spec(request, (10, 4))
+
+    def test_negotiation(self):
+        self.assertEqual(self.spec(self.CHROME_ACCEPT).format, 'webp')
+        self.assertEqual(self.spec('*/*').format, 'png')
+        self.assertEqual(self.spec('').format, 'png')
+        self.assertEqual(self.spec('image/webp;q=0.5, image/png').format, 'png')
+        self.assertEqual(self.spec('image/svg+xml').format, 'svg')
+        self.assertEqual(self.spec(self.CHROME_ACCEPT, format='SVG').format, 'svg')
+        self.assertEqual(self.spec('image/webp', format='gif').format, 'webp')
+
+    def test_size_parameters_are_clamped(self):
+        self.assertEqual(self.spec(), ('png', (10, 4), 100))
+        self.assertEqual(self.spec(w=500).figsize, (5, 2))
+        self.assertEqual(self.spec(w=500, h=500, dpi=200).figsize, (2.5, 2.5))
+        self.assertEqual(self.spec(w=10**6, h=1, dpi=1), ('png', (48, 3), 50))
+        self.assertEqual(self.spec(w='wide').figsize, (10, 4))
+
+    def test_encodings(self):
+        def chart(image_format):
+            return charts.line_chart(list(range(20)), [(list(range(20)), 'blue', None)], fmt=image_format,
+                                     figsize=(4, 2), dpi=100)
+        png = Image.open(io.BytesIO(chart('png')))
+        self.assertEqual((png.format, png.mode, png.size), ('PNG', 'P', (400, 200)))
+        self.assertEqual(Image.open(io.BytesIO(chart('webp'))).format, 'WEBP')
+        self.assertIn(b'<svg', chart('svg'))
+
+
+class ChartRenderingTests(SimpleTestCase):
+    def render(self, seed):
+        rng = random.Random(seed)
+        y = [rng.randint(0, 1000) for _ in range(60)]
+        return charts.line_chart(list(range(60)), [(y, 'blue', 'Profit')], title=f"Chart {seed}",
+                                 max_xticks=10, legend=True)
+
+    def test_concurrent_renders_match_serial_ones(self):
+        serial = [self.render(seed) for seed in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(pool.map(self.render, range(8)))
+        self.assertEqual(threaded, serial)
+        self.assertTrue(serial[0].startswith(b'\x89PNG'))
+
+    def test_placeholder(self):
+        self.assertTrue(charts.placeholder("No data").startswith(b'\x89PNG'))
+        self.assertIs(charts.placeholder("No data"), charts.placeholder("No data"))
+
+    def test_lttb_keeps_the_ends_and_the_extremes(self):
+        y = np.zeros(1000)
+        y[[137, 612]] = [9.0, -5.0]
+        kept = chart_data.lttb_indices(np.arange(1000.0), y, 50)
+        self.assertEqual(len(kept), 50)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertTrue({137, 612} <= set(kept.tolist()))
+        self.assertTrue((np.diff(kept) > 0).all())
+
+    def test_downsample_long_date_series(self):
+        dates = pd.date_range('2010-01-01', periods=5000, freq='D')
+        sell = np.sin(np.arange(5000) / 50.0)
+        sell[:100] = np.nan  # no sells yet
+        series = chart_data.Series(dates, {'buy': np.arange(5000.0), 'sell': sell})
+        reduced = chart_data.downsample(series, 200)
+        self.assertLessEqual(len(reduced.dates), 400)
+        self.assertEqual(reduced.dates[0], dates[0])
+        self.assertEqual(reduced.dates[-1], dates[-1])
+        self.assertEqual(len(reduced.columns['sell']), len(reduced.dates))
+        self.assertIs(chart_data.downsample(series, 10_000), series)
+        png = charts.line_chart(reduced.dates, [(reduced.columns['sell'], 'red', None)], max_xticks=10)
+        self.assertTrue(png.startswith(b'\x89PNG'))
+
+
+@override_settings(FIFO_RECALC_ASYNC=False)
+class ChartDataTests(TestCase):
+    def setUp(self):
+        # Items of earlier tests were rolled back without a post_delete signal.
+        resolver.invalidate()
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.client.force_login(self.user)
+        for trans_type, price, quantity, day in [('Buy', 1, 10, '2024-01-01'), ('Buy', 3, 10, '2024-01-01'),
+                                                 ('Sell', 4, 5, '2024-01-04'), ('Sell', 5, 5, '2024-02-10')]:
+            self.client.post('/', {'add_transaction': '1', 'item_name': 'Item', 'trans_type': trans_type,
+                                   'price': price, 'quantity': quantity, 'date_of_holding': day})
+
+    def test_item_price_series(self):
+        data = self.client.get('/charts/item-price/data/', {'search': 'item'}).json()
+        self.assertEqual(data['item'], 'Item')
+        self.assertEqual(data['dates'][0], '2024-01-01')
+        self.assertEqual(len(data['dates']), 41)
+        self.assertEqual(data['series']['buy_price'][:2], [2_000_000, 2_000_000])
+        self.assertEqual(data['series']['sell_price'][:4], [None, None, None, 4_000_000])
+
+    def test_buckets_keep_their_native_frequency(self):
+        data = self.client.get('/charts/item-price/data/', {'search': 'item', 'timeframe': 'Monthly'}).json()
+        self.assertEqual(data['dates'], ['2024-01-01', '2024-02-01'])
+        self.assertEqual(data['series'], {'buy_price': [2_000_000, 2_000_000],
+                                          'sell_price': [4_000_000, 5_000_000]})
+
+    def test_profit_series_match_the_stored_profits(self):
+        data = self.client.get('/charts/global-profit/data/', {'timeframe': 'Monthly'}).json()
+        self.assertEqual(data['dates'], ['2024-01-01', '2024-02-01'])
+        final = Transaction.objects.filter(user=self.user).order_by('-date_of_holding').first()
+        self.assertAlmostEqual(data['series']['cumulative_profit'][-1], final.cumulative_profit)
+        item = self.client.get('/charts/item-profit/data/', {'search': 'item', 'timeframe': 'Yearly'}).json()
+        self.assertAlmostEqual(item['series']['cumulative_profit'][0], final.cumulative_profit)
+
+    def test_max_points(self):
+        data = self.client.get('/charts/item-price/data/', {'search': 'item', 'max_points': 10}).json()
+        self.assertLessEqual(len(data['dates']), 20)
+        self.assertEqual(data['dates'][0], '2024-01-01')
+        full = self.client.get('/charts/item-price/data/', {'search': 'item', 'max_points': 'x'}).json()
+        self.assertEqual(len(full['dates']), 41)
+        response = self.client.get('/charts/item-price/', {'search': 'item', 'max_points': 10})
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+    def test_image_formats_and_sizes(self):
+        url, params = '/charts/item-price/', {'search': 'item'}
+        response = self.client.get(url, params, HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('Accept', response['Vary'])
+        hit = self.client.get(url, params, HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual((hit['X-Chart-Cache'], hit['Content-Type']), ('hit', 'image/webp'))
+        self.assertEqual(self.client.get(url, params)['X-Chart-Cache'], 'miss')  # PNG is cached separately
+        small = self.client.get(url, dict(params, w=500))
+        self.assertEqual(Image.open(io.BytesIO(small.content)).size, (500, 200))
+        svg = self.client.get(url, dict(params, format='svg'))
+        self.assertEqual(svg['Content-Type'], 'image/svg+xml')
+        missing = self.client.get(url, {'search': 'nope', 'format': 'webp'})
+        self.assertEqual(missing['Content-Type'], 'image/webp')
+
+    def test_dashboard_combines_both_item_series(self):
+        price = self.client.get('/charts/item-price/data/', {'search': 'item', 'timeframe': 'Monthly'}).json()
+        profit = self.client.get('/charts/item-profit/data/', {'search': 'item', 'timeframe': 'Monthly'}).json()
+        with self.assertNumQueries(3):  # session + user + rollups
+            both = self.client.get('/charts/item-dashboard/data/', {'search': 'item', 'timeframe': 'Monthly'}).json()
+        self.assertEqual(both['dates'], price['dates'])
+        self.assertEqual(both['series'], dict(price['series'], **profit['series']))
+
+    def test_dashboard_image(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/charts/item-dashboard/', {'search': 'item'})
+        self.assertEqual(response['X-Chart-Cache'], 'miss')
+        self.assertEqual(Image.open(io.BytesIO(response.content)).size, (1000, 700))
+        self.assertEqual(self.client.get('/charts/item-dashboard/', {'search': 'nope'})['Content-Type'], 'image/png')
+        self.assertEqual(self.client.get('/charts/item-dashboard/data/').status_code, 400)
+
+    def test_errors_and_gzip(self):
+        self.assertEqual(self.client.get('/charts/item-profit/data/').status_code, 400)
+        self.assertEqual(self.client.get('/charts/item-profit/data/', {'search': 'nope'}).status_code, 404)
+        response = self.client.get('/charts/item-price/data/', {'search': 'item'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(self.client.get('/wealth/chart/data/').json(), {'dates': [], 'series': {}})
+
+
+class WealthPointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.client.force_login(self.user)
+        self.bank = WealthData.objects.create(account_name='trader', year=2024, january='1,000.5',
+                                              february=' 200 ', march='n/a', april='')
+        self.main = WealthData.objects.create(account_name='trader', year=2024, january='2,000')
+        WealthData.objects.create(account_name='trader', year=2023, december='300')
+        WealthData.objects.create(account_name='other', year=2024, january='9,999')
+
+    def test_parse_value(self):
+        self.assertEqual(wealth.parse_value('1,234.567'), Decimal('1234.57'))
+        self.assertEqual(wealth.parse_value(' -5 '), Decimal('-5.00'))
+        for text in (None, '', 'n/a', 'nan', 'inf', '1e30'):
+            self.assertIsNone(wealth.parse_value(text))
+
+    def test_saving_syncs_points(self):
+        self.assertEqual(sorted(self.bank.points.values_list('month', 'value')),
+                         [(1, Decimal('1000.50')), (2, Decimal('200.00'))])
+        self.bank.february = ''
+        self.bank.may = '50'
+        self.bank.save()
+        self.assertEqual(sorted(self.bank.points.values_list('month', flat=True)), [1, 5])
+        self.bank.delete()
+        self.assertFalse(WealthPoint.objects.filter(wealth_data_id=self.bank.pk).exists())
+
+    def test_monthly_totals(self):
+        with self.assertNumQueries(1):
+            totals = wealth.monthly_totals('trader', 2024)
+        self.assertEqual(totals, {(2024, 1): Decimal('3000.50'), (2024, 2): Decimal('200.00')})
+        self.assertEqual(wealth.monthly_totals('trader')[(2023, 12)], Decimal('300.00'))
+
+    def test_rebuild_points(self):
+        WealthData.objects.filter(pk=self.main.pk).update(january='5')
+        self.assertEqual(wealth.rebuild_points(), 5)
+        self.assertEqual(wealth.monthly_totals('trader', 2024)[(2024, 1)], Decimal('1005.50'))
+
+    def test_views_use_the_totals(self):
+        response = self.client.get('/wealth/', {'year': 'all'})
+        self.assertEqual(response.context['monthly_totals']['january'], Decimal('3000.50'))
+        self.assertEqual(response.context['monthly_totals']['december'], Decimal('300.00'))
+        self.assertEqual(response.context['monthly_totals']['june'], 0)
+        data = self.client.get('/wealth/chart/data/').json()
+        self.assertEqual(data['dates'], ['2023-12-01', '2024-01-01', '2024-02-01'])
+        self.assertEqual(data['series']['total_wealth'], [300.0, 3000.5, 200.0])
+
+
+class WealthAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trader', password='pw')
+        self.client.force_login(self.user)
+        WealthData.objects.create(account_name='trader', year=2023, january='100', february='110',
+                                  march='99', december='120')
+        WealthData.objects.create(account_name='trader', year=2024, january='50', march='130', april='0')
+        WealthData.objects.create(account_name='trader', year=2024, january='40')
+
+    def test_analyse(self):
+        with self.assertNumQueries(1):
+            analytics = wealth_analytics.analyse('trader')
+        series = chart_data.to_json(analytics.series)
+        self.assertEqual((series['dates'][0], series['dates'][-1]), ('2023-01-01', '2024-03-01'))
+        columns = series['series']
+        self.assertEqual(columns['change'][:4], [None, 10.0, -11.0, None])
+        self.assertEqual(columns['change'][-3:], [-30.0, None, None])
+        self.assertAlmostEqual(columns['growth_3m'][-1], 130 / 120 - 1)
+        self.assertAlmostEqual(columns['growth_12m'][-1], 130 / 99 - 1)
+        self.assertAlmostEqual(columns['drawdown'][2], 99 / 110 - 1)
+        self.assertEqual(analytics.yoy[2024][:3], [-10.0, None, 31.0])
+        self.assertEqual(analytics.yoy[2023], [None] * 12)
+        self.assertEqual(analytics.summary['month'], '2024-03')
+        self.assertEqual((analytics.summary['max_drawdown'], analytics.summary['peak'],
+                          analytics.summary['trough']), (-0.25, '2023-12', '2024-01'))
+        self.assertIsNone(wealth_analytics.analyse('nobody'))
+
+    def test_wealth_list_and_json(self):
+        response = self.client.get('/wealth/', {'year': 2024})
+        self.assertEqual(response.context['monthly_changes']['january'], -30.0)
+        self.assertEqual(response.context['yearly_changes']['march'], 31.0)
+        self.assertContains(response, '-25.0%')
+        self.assertNotContains(self.client.get('/wealth/', {'year': 'all'}), 'Change vs Previous Month')
+        data = self.client.get('/wealth/analytics/data/').json()
+        self.assertEqual(len(data['dates']), 15)
+        self.assertEqual(data['yoy']['2024'][0], -10.0)
+        self.assertEqual(data['summary']['trough'], '2024-01')
+        self.client.force_login(User.objects.create_user(username='newcomer', password='pw'))
+        self.assertEqual(self.client.get('/wealth/analytics/data/').json(),
+                         {'dates': [], 'series': {}, 'yoy': {}, 'summary': None})
+
+
+class ImportTimeTests(SimpleTestCase):
+    """
+    Worker boot and management commands must not pay for the chart stack:
+    the views and the FIFO engine import neither NumPy, pandas nor matplotlib.
+    """
+
+    # Cumulative import time of the trades package (its modules imported by
+    # django.setup() included), in microseconds.  Around 10ms here; with the
+    # chart stack it was over 1s.
+    BUDGET_US = 250_000
+
+    def import_times(self):
+        """{module: cumulative microseconds} for every module imported, nested ones included."""
+        code = ('import django; django.setup(); '
+                'import trades.views, trades.fifo, trades.management.commands.recalculate_fifo')
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                capture_output=True, text=True, check=True)
+        times = {}
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and 'cumulative' not in line:
+                _, cumulative, name = line[len('import time:'):].split('|')
+                # Nesting shows as indentation; only top-level entries are summed below.
+                times[name.rstrip()[1:]] = int(cumulative)
+        return times
+
+    def test_no_heavy_imports(self):
+        modules = {name.strip() for name in self.import_times()}
+        for heavy in ('numpy', 'pandas', 'matplotlib'):
+            self.assertNotIn(heavy, modules)
+
+    def test_import_budget(self):
+        times = self.import_times()
+        total = sum(us for name, us in times.items() if name.startswith('trades'))
+        self.assertLess(total, self.BUDGET_US)
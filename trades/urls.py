@@ -15,10 +15,16 @@ urlpatterns = [
 
     # The *wealth* chart across all years for the logged-in user:
     path('wealth/chart/', views.wealth_chart_all_years, name='wealth_chart_all_years'),
+    path('wealth/chart/data/', views.wealth_data_series, name='wealth_data_series'),
+    path('wealth/analytics/data/', views.wealth_analytics_data, name='wealth_analytics_data'),
 
     # Transactions
     path('transactions/', views.transaction_list, name='transaction_list'),
     path('transaction/add/', views.transaction_add, name='transaction_add'),
+    path('transactions/rows/', views.transaction_rows, name='transaction_rows'),
+
+    # Item/alias name typeahead (JSON)
+    path('items/suggest/', views.item_suggest, name='item_suggest'),
 
     # Aliases
     path('alias/', views.alias_list, name='alias_list'),
@@ -32,12 +38,22 @@ urlpatterns = [
 
     # Global realized profit chart (for the logged-in user)
     path('charts/global-profit/', views.global_profit_chart, name='global_profit_chart'),
+    path('charts/global-profit/data/', views.global_profit_data, name='global_profit_data'),
 
     # Item price chart
     path('charts/item-price/', views.item_price_chart, name='item_price_chart'),
+    path('charts/item-price/data/', views.item_price_data, name='item_price_data'),
 
     # Item profit chart
     path('charts/item-profit/', views.item_profit_chart, name='item_profit_chart'),
+    path('charts/item-profit/data/', views.item_profit_data, name='item_profit_data'),
+
+    # Item price and profit charts in one image / one payload
+    path('charts/item-dashboard/', views.item_dashboard_chart, name='item_dashboard_chart'),
+    path('charts/item-dashboard/data/', views.item_dashboard_data, name='item_dashboard_data'),
+
+    # Chart cache counters (staff only)
+    path('charts/cache-stats/', views.chart_cache_stats, name='chart_cache_stats'),
 
     # Account & Password Reset
     path('account/', views.account_page, name='account_page'),
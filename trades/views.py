@@ -2,35 +2,32 @@
 
 #!/usr/bin/env python
 """Django views for the trades app."""
-import io
-import numpy as np  # <-- ADDED for NaN replacements
-import pandas as pd
 from datetime import datetime
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db.models import Sum, Avg, Max
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.http import urlencode
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
-from django.db import transaction  # For atomic transactions
-import matplotlib.pyplot as plt
-from matplotlib.ticker import StrMethodFormatter
-
-# Force matplotlib to use a non-interactive backend so that no GUI is started.
-import matplotlib
-matplotlib.use("Agg")
-
+from django.conf import settings
 from .models import WealthData, UserBan
+# The chart views import chart_data/charts (pandas, matplotlib) when they
+# first run, so worker boot and pages without charts don't load them.
+from . import chart_cache, chart_formats, resolver, wealth
+from .chart_cache import cached_chart
+from .fifo import calculate_fifo_for_new_trade, fifo_position, request_fifo_recalc
+from .services import EMPTY_ITEM_STATS, get_item_stats
 from .forms import WealthDataForm
 from django.db.models import Q
 
 from .models import (
     Transaction, Item, Alias, AccumulationPrice, TargetSellPrice,
-    Membership, WealthData, Watchlist
+    Membership, WealthData, Watchlist, FifoRecalcRequest, UserTradeTotals,
 )
 from .forms import (
     TransactionManualItemForm, TransactionEditForm, AliasForm, AccumulationPriceForm,
@@ -66,7 +63,7 @@ def index(request):
             if tform.is_valid():
                 new_trans = tform.save(user=request.user)
                 messages.success(request, f"Transaction for {new_trans.item.name} added successfully!")
-                calculate_fifo_for_user(request.user)  # Recalculate only for this user
+                calculate_fifo_for_new_trade(new_trans)  # Recalculate only for this user
                 # Redirect with ?search=<item_name>
                 url = reverse('trades:index')
                 qs = urlencode({'search': new_trans.item.name})
@@ -111,9 +108,10 @@ def index(request):
                 try:
                     t_obj = Transaction.objects.get(id=t_id, user=request.user)
                     item_name = t_obj.item.name
+                    position = fifo_position(t_obj)
                     t_obj.delete()
                     messages.success(request, "Transaction deleted.")
-                    calculate_fifo_for_user(request.user)
+                    request_fifo_recalc(request.user, since=position)
                     # Redirect with ?search=the item name
                     url = reverse('trades:index')
                     qs = urlencode({'search': item_name})
@@ -128,7 +126,9 @@ def index(request):
             if ef.is_valid():
                 updated_trans = ef.update_transaction(user=request.user)
                 messages.success(request, "Transaction updated.")
-                calculate_fifo_for_user(request.user)
+                # The trade may have moved either way in the FIFO order.
+                since = min(ef.original_position, fifo_position(updated_trans))
+                request_fifo_recalc(request.user, since=since)
                 url = reverse('trades:index')
                 qs = urlencode({'search': updated_trans.item.name})
                 return redirect(f"{url}?{qs}")
@@ -160,42 +160,31 @@ def index(request):
     accumulation_obj = None
     target_obj = None
     item_transactions = []
-    total_sold = 0
-    remaining_qty = 0
-    avg_sold_price = 0
-    item_profit = 0
-    global_realised_profit = Transaction.objects.filter(user=request.user).aggregate(total=Max('cumulative_profit'))['total'] or 0
+    item_stats = EMPTY_ITEM_STATS
+    did_you_mean = []
+    totals = UserTradeTotals.objects.filter(user=request.user).first()
+    global_realised_profit = totals.realised_profit if totals else 0
+    profit_stale = FifoRecalcRequest.objects.filter(user=request.user).exists()
     item_image_url = ""
 
     if search_query:
-        alias_match = Alias.objects.filter(short_name__iexact=search_query).first()
-        if not alias_match:
-            alias_match = Alias.objects.filter(full_name__iexact=search_query).first()
-        if alias_match:
-            item_obj = Item.objects.filter(name__iexact=alias_match.full_name).first()
-            item_alias = alias_match
-        else:
-            item_obj = Item.objects.filter(name__iexact=search_query).first()
+        item_alias, item_obj = resolver.resolve(search_query)
 
         if item_obj:
             if item_alias is None:
-                item_alias = Alias.objects.filter(full_name__iexact=item_obj.name).first()
+                item_alias = resolver.alias_for_item(item_obj.name)
             accumulation_obj = AccumulationPrice.objects.filter(item=item_obj).first()
             target_obj = TargetSellPrice.objects.filter(item=item_obj).first()
-            item_transactions = Transaction.objects.filter(item=item_obj, user=request.user).order_by('-date_of_holding')
-            sells = item_transactions.filter(trans_type='Sell')
-            total_sold = sells.aggregate(sold_sum=Sum('quantity'))['sold_sum'] or 0
-            buys_qty = item_transactions.filter(trans_type='Buy').aggregate(buy_sum=Sum('quantity'))['buy_sum'] or 0
-            remaining_qty = buys_qty - total_sold
-            if total_sold > 0:
-                avg_sold_price = sells.aggregate(avg_price=Avg('price'))['avg_price'] or 0
-            item_profit = item_transactions.aggregate(item_profit_sum=Sum('realised_profit'))['item_profit_sum'] or 0
+            item_transactions = (Transaction.objects.filter(item=item_obj, user=request.user)
+                                 .select_related('item').order_by('-date_of_holding', '-id'))
+            item_stats = get_item_stats(request.user, item_obj)
             if item_alias and item_alias.image_file:
                 item_image_url = item_alias.image_file.url
         else:
             messages.warning(request, f"No item or alias found matching '{search_query}'.")
+            did_you_mean = [name for name, _ in resolver.similar_names(search_query)]
 
-    all_transactions = Transaction.objects.filter(user=request.user).order_by('-date_of_holding')
+    all_transactions, next_cursor = transaction_page(request.user)
 
     context = {
         'transaction_form': TransactionManualItemForm(),
@@ -207,18 +196,76 @@ def index(request):
         'accumulation_obj': accumulation_obj,
         'target_obj': target_obj,
         'item_transactions': item_transactions,
-        'total_sold': total_sold,
-        'remaining_qty': remaining_qty,
-        'avg_sold_price': avg_sold_price,
-        'item_profit': item_profit,
+        'total_sold': item_stats['total_sold'],
+        'remaining_qty': item_stats['remaining_qty'],
+        'average_cost': item_stats['average_cost'],
+        'avg_sold_price': item_stats['avg_sold_price'],
+        'item_profit': item_stats['item_profit'],
         'global_realised_profit': global_realised_profit,
+        'profit_stale': profit_stale,
         'item_image_url': item_image_url,
         'all_transactions': all_transactions,
+        'next_cursor': next_cursor,
+        'did_you_mean': did_you_mean,
         'form': form,  # Alias add/edit form.
     }
     return render(request, 'trades/index.html', context)
 
 
+def transaction_page(user, cursor=None):
+    """
+    One page of the user's transactions, newest first, using keyset pagination
+    on (date_of_holding, id) so every page is an indexed range scan no matter
+    how deep it is.  ``cursor`` is the value returned with the previous page.
+    Returns (transactions, next_cursor); next_cursor is '' on the last page.
+    """
+    page_size = getattr(settings, 'TRANSACTIONS_PAGE_SIZE', 50)
+    qs = (Transaction.objects.filter(user=user)
+          .select_related('item')
+          .order_by('-date_of_holding', '-id'))
+    if cursor:
+        try:
+            date_str, id_str = cursor.split('.')
+            last_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            last_id = int(id_str)
+        except ValueError:
+            pass
+        else:
+            qs = qs.filter(Q(date_of_holding__lt=last_date) | Q(date_of_holding=last_date, id__lt=last_id))
+    rows = list(qs[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, ''
+    rows = rows[:page_size]
+    return rows, f"{rows[-1].date_of_holding:%Y-%m-%d}.{rows[-1].id}"
+
+
+@login_required
+def transaction_rows(request):
+    """Table-row fragment with the next page of the index page's transaction list."""
+    transactions, next_cursor = transaction_page(request.user, request.GET.get('cursor', ''))
+    response = render(request, 'trades/transaction_rows.html', {'transactions': transactions})
+    response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@login_required
+def item_suggest(request):
+    """JSON typeahead for item/alias names, served from the in-process name index."""
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    return JsonResponse({'results': resolver.suggest(request.GET.get('q', ''), limit)})
+
+
+@login_required
+def chart_cache_stats(request):
+    """Hit/miss counters of this worker's chart cache (staff only)."""
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+    return JsonResponse(chart_cache.stats())
+
+
 from django.db.models import Case, When, F, CharField
 
 def alias_list(request):
@@ -250,8 +297,7 @@ def alias_list(request):
                 form = AliasForm(request.POST, request.FILES, instance=alias_obj)
             else:
                 form = AliasForm(request.POST, request.FILES)
-            if form.is_valid():
-                form.save()
+            if form.is_valid() and form.save():
                 messages.success(request, "Alias saved!")
                 return redirect('trades:alias_list')
             else:
@@ -261,7 +307,10 @@ def alias_list(request):
 
     letter = request.GET.get('letter', '')
     if letter:
-        qs = Alias.objects.filter(full_name__istartswith=letter)
+        # A range on LOWER(full_name) can use the unique (full, short) index.
+        letter = letter[0].lower()
+        qs = (Alias.objects.annotate(full_name_lower=Lower('full_name'))
+              .filter(full_name_lower__gte=letter, full_name_lower__lt=chr(ord(letter) + 1)))
     else:
         qs = Alias.objects.all()
     aliases = qs.order_by('full_name')
@@ -312,19 +361,16 @@ from django.contrib import messages
 from datetime import datetime
 from .models import WealthData
 from .forms import WealthDataForm
-import io
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from matplotlib.ticker import StrMethodFormatter
 
 @login_required
 def wealth_list(request):
     """
     Display all wealth data records for the logged-in user,
     either for a selected year or for all years (?year=all).
-    Then compute combined wealth totals for the filtered records.
+    Then compute combined wealth totals for the filtered records, and the
+    wealth analytics (changes, growth, drawdown) across all years.
     """
+    from . import wealth_analytics
     current_year = datetime.now().year
 
     # Only this user’s data
@@ -355,25 +401,25 @@ def wealth_list(request):
         selected_year = current_year
         wealth_records = all_records.filter(year=current_year)
 
-    # Build monthly totals from the filtered records
-    months = ["january", "february", "march", "april", "may",
-              "june", "july", "august", "september", "october", "november", "december"]
-    monthly_totals = {}
-    for m in months:
-        total = 0
-        for rec in wealth_records:
-            val_str = (getattr(rec, m) or "0").replace(',', '').strip()
-            try:
-                total += float(val_str)
-            except:
-                total += 0
-        monthly_totals[m] = total
+    # Monthly totals of the filtered records, summed over years for 'all'
+    totals = wealth.monthly_totals(request.user.username, None if selected_year == 'all' else selected_year)
+    monthly_totals = {m: 0 for m in wealth.MONTH_FIELDS}
+    for (_, month), total in totals.items():
+        monthly_totals[wealth.MONTH_FIELDS[month - 1]] += total
+
+    # Month-over-month and year-over-year rows only make sense for a single year
+    analytics = wealth_analytics.analyse(request.user.username)
+    monthly_changes, yearly_changes = wealth_analytics.year_changes(
+        analytics, None if selected_year == 'all' else selected_year)
 
     context = {
         'wealth_records': wealth_records,
         'years': years_for_user,  # used for the year nav
         'selected_year': selected_year,  # can be 'all' or int
         'monthly_totals': monthly_totals,
+        'monthly_changes': monthly_changes,
+        'yearly_changes': yearly_changes,
+        'wealth_summary': analytics.summary if analytics else None,
     }
     return render(request, 'trades/wealth_list.html', context)
 
@@ -460,10 +506,12 @@ def wealth_mass_delete(request):
 
 
 @login_required
+@cached_chart('wealth_year', scope='wealth')
 def wealth_chart(request):
     """
     Show a line chart for the current user, for a selected year or default year.
     """
+    from . import charts
     current_year = datetime.now().year
     selected_year = request.GET.get('year')
     if selected_year:
@@ -474,111 +522,44 @@ def wealth_chart(request):
     else:
         selected_year = current_year
 
-    # Filter only for this user and this year
-    wealth_records = WealthData.objects.filter(
-        account_name=request.user.username,
-        year=selected_year
-    )
+    # Only this user, only this year
+    totals = wealth.monthly_totals(request.user.username, selected_year)
     months = ["January", "February", "March", "April", "May", "June",
               "July", "August", "September", "October", "November", "December"]
-    monthly_totals = []
-    for m in months:
-        total = 0
-        for rec in wealth_records:
-            try:
-                val_str = (getattr(rec, m.lower()) or "0").replace(',', '').strip()
-                total += float(val_str)
-            except:
-                total += 0
-        monthly_totals.append(total)
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.plot(months, monthly_totals, linestyle='-', color='green', linewidth=1)
-    ax.set_xlabel("Month")
-    ax.set_ylabel("Total Wealth")
-    ax.set_title(f"Wealth Totals for {selected_year} (You Only)")
-    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
-    plt.xticks(rotation=45)
-    fig.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
+    monthly_totals = [float(totals.get((selected_year, month), 0)) for month in range(1, 13)]
+
+    spec = chart_formats.image_spec(request, (8, 4))
+    return charts.line_chart(
+        months, [(monthly_totals, 'green', None)],
+        title=f"Wealth Totals for {selected_year} (You Only)",
+        xlabel="Month", ylabel="Total Wealth",
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
+    )
 
 
 @login_required
+@cached_chart('wealth_all_years', scope='wealth')
 def wealth_chart_all_years(request):
     """
     Show a line chart for the current user across all years,
     or optionally for a specific ?year= param if you want.
     Currently we just show everything for this user.
     """
-    selected_year = request.GET.get('year', '')
-    if selected_year.lower() == 'all':
-        wealth_records = WealthData.objects.filter(account_name=request.user.username).order_by('year')
-    else:
-        # If user passes a numeric year, they get that year. If nothing, we do same.
-        # But typically, we do all years for the chart.
-        # For simplicity, let's do all if we want to replicate "All" behavior.
-        wealth_records = WealthData.objects.filter(account_name=request.user.username).order_by('year')
-
-    months = ["January", "February", "March", "April", "May", "June",
-              "July", "August", "September", "October", "November", "December"]
-    monthly_totals = {}
-    for rec in wealth_records:
-        year = rec.year
-        for i, m in enumerate(months, start=1):
-            try:
-                val_str = (getattr(rec, m.lower()) or "0").replace(',', '').strip()
-                val = float(val_str)
-            except:
-                val = 0
-            key = f"{year}-{i:02d}"
-            monthly_totals[key] = monthly_totals.get(key, 0) + val
-
-    # Sort keys and build the chart
-    sorted_keys = sorted(monthly_totals.keys())  # e.g. ['2023-01','2023-02',...]
-    x_labels = []
-    y_values = []
-    for key in sorted_keys:
-        yr, mo = key.split('-')
-        mo_int = int(mo)
-        label = f"{months[mo_int-1][:3]} {yr}"
-        x_labels.append(label)
-        y_values.append(monthly_totals[key])
-
-    # Filter out zero months if you like
-    filtered_x = []
-    filtered_y = []
-    for lbl, val in zip(x_labels, y_values):
-        if val != 0:
-            filtered_x.append(lbl)
-            filtered_y.append(val)
-
-    if filtered_x:
-        x_labels = filtered_x
-        y_values = filtered_y
+    from . import chart_data, charts
+    series = chart_data.wealth_series(request.user.username)
+    if series is not None:
+        x_labels, y_values = list(series.dates.strftime('%b %Y')), series.columns['total_wealth']
     else:
         # fallback if all zero
-        x_labels = months
-        y_values = [0]*12
-
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(x_labels, y_values, linestyle='-', color='green', linewidth=1)
-    ax.set_xlabel("Month-Year")
-    ax.set_ylabel("Total Wealth")
-    ax.set_title("All-Year Wealth Totals (You Only)")
-    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
-    plt.xticks(rotation=45)
-    fig.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
+        x_labels, y_values = chart_data.MONTHS, [0] * 12
+
+    spec = chart_formats.image_spec(request, (10, 5))
+    return charts.line_chart(
+        x_labels, [(y_values, 'green', None)],
+        title="All-Year Wealth Totals (You Only)",
+        xlabel="Month-Year", ylabel="Total Wealth",
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
+    )
 
 
 @login_required
@@ -609,7 +590,7 @@ def transaction_add(request):
         if form.is_valid():
             new_trans = form.save(user=request.user)
             messages.success(request, f"Transaction for {new_trans.item.name} added.")
-            calculate_fifo_for_user(request.user)
+            calculate_fifo_for_new_trade(new_trans)
             return redirect('trades:transaction_list')
     else:
         form = TransactionManualItemForm()
@@ -675,10 +656,7 @@ def recent_trades(request):
         .order_by('-id')[:50]
     )
     for t in transactions:
-        first_alias = Alias.objects.filter(
-            full_name__iexact=t.item.name,
-            image_file__isnull=False
-        ).first()
+        first_alias = resolver.alias_for_item(t.item.name, with_image=True)
         # Only set first_image_url if the alias has an associated file
         if first_alias and first_alias.image_file and first_alias.image_file.name:
             t.first_image_url = first_alias.image_file.url
@@ -696,57 +674,6 @@ def logout_view(request):
     return redirect('trades:login_view')
 
 
-# ------------------------------------------------------------------------
-# FIFO RECALC METHODS
-# ------------------------------------------------------------------------
-def calculate_fifo_for_user(user):
-    """
-    FIFO logic for *one* user.
-    Resets realized & cumulative profit for that user, then re-walks transactions.
-    Wrapped in a single atomic block to reduce database locking.
-    """
-    with transaction.atomic():
-        Transaction.objects.filter(user=user).update(realised_profit=0.0, cumulative_profit=0.0)
-        purchase_lots = {}  # {item_id: [ {qty, price}, ... ] }
-        cumulative_sum = 0.0
-        user_trans = Transaction.objects.filter(user=user).order_by('date_of_holding', 'trans_type', 'id')
-        for trans in user_trans:
-            item_id = trans.item_id
-            if item_id not in purchase_lots:
-                purchase_lots[item_id] = []
-            if trans.trans_type == 'Buy':
-                purchase_lots[item_id].append({'qty': trans.quantity, 'price': trans.price})
-                trans.realised_profit = 0.0
-            else:  # Sell
-                qty_to_sell = trans.quantity
-                sell_price = trans.price
-                profit = 0.0
-                while qty_to_sell > 0 and purchase_lots[item_id]:
-                    lot = purchase_lots[item_id][0]
-                    used = min(qty_to_sell, lot['qty'])
-                    # Example includes 2% fee
-                    partial_profit = (sell_price * used * 0.98) - (lot['price'] * used)
-                    profit += partial_profit
-                    lot['qty'] -= used
-                    qty_to_sell -= used
-                    if lot['qty'] <= 0:
-                        purchase_lots[item_id].pop(0)
-                trans.realised_profit = profit
-            cumulative_sum += trans.realised_profit
-            trans.cumulative_profit = cumulative_sum
-            trans.save()
-
-
-def calculate_fifo_for_all_users():
-    """
-    Used rarely (like after big CSV imports).
-    Recalculates for *every* user in the system.
-    """
-    all_users = User.objects.filter(transaction__isnull=False).distinct()
-    for u in all_users:
-        calculate_fifo_for_user(u)
-
-
 # --- Admin functionality: user management (list users & ban them) ---
 @login_required
 def user_management(request):
@@ -782,13 +709,30 @@ def user_management(request):
 # ----------------------------------------------------------------------------
 # NEW VIEWS FOR REALISED PROFIT CHARTS (UPDATED to handle timeframe + forward-fill)
 # ----------------------------------------------------------------------------
-import matplotlib
-matplotlib.use("Agg")
-from matplotlib.ticker import StrMethodFormatter, MaxNLocator
 from django.shortcuts import HttpResponse
 from django.contrib.auth.decorators import login_required
 
+
+def _image_response(spec):
+    """Empty response for a chart image as ``spec`` asks, for line_chart() to write into."""
+    return HttpResponse(content_type=chart_formats.FORMATS[spec.format])
+
+
+def _placeholder_response(spec, message):
+    from . import charts
+    return HttpResponse(charts.placeholder(message, spec.format), content_type=chart_formats.FORMATS[spec.format])
+
+
+def _max_points(request, default=None):
+    """The request's ?max_points= (3 at least, the fewest LTTB can keep), else ``default``."""
+    try:
+        return max(int(request.GET['max_points']), 3)
+    except (KeyError, ValueError):
+        return default
+
+
 @login_required
+@cached_chart('global_profit')
 def global_profit_chart(request):
     """
     Shows the logged-in user's global realized (cumulative) profit over time,
@@ -796,356 +740,225 @@ def global_profit_chart(request):
     (Daily/Monthly/Yearly) and forward-fill missing dates to keep
     the line continuous (no zero dips). Also uses MaxNLocator to reduce x-ticks.
     """
+    from . import chart_data, charts
     user = request.user
     timeframe = request.GET.get('timeframe', 'Daily')
-
-    queryset = Transaction.objects.filter(user=user).order_by('date_of_holding', 'id')
-    if not queryset.exists():
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, "No transactions found for global chart", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    # Build DataFrame
-    rows = []
-    for tx in queryset:
-        rows.append({
-            'date': tx.date_of_holding,
-            'cumulative_profit': tx.cumulative_profit
-        })
-    df = pd.DataFrame(rows)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
-
-    # Resample based on timeframe
-    if timeframe == 'Monthly':
-        df = df.resample('MS').last()  # "Month Start"
-    elif timeframe == 'Yearly':
-        df = df.resample('YS').last()  # "Year Start"
-    else:
-        # Daily
-        df = df.resample('D').last()
-
-    # Forward-fill missing data
-    df['cumulative_profit'] = df['cumulative_profit'].ffill()
-
-    # Build x-label column for plotting
-    if timeframe == 'Monthly':
-        df['x_label'] = df.index.strftime('%Y-%m')
-    elif timeframe == 'Yearly':
-        df['x_label'] = df.index.strftime('%Y')
-    else:
-        df['x_label'] = df.index.strftime('%Y-%m-%d')
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(9, 4))
-    ax.plot(df['x_label'], df['cumulative_profit'], color='blue', linewidth=1, marker='')
-    ax.set_xlabel('Date')
-    ax.set_ylabel('Cumulative Profit')
-    ax.set_title(f"Global Realized Profit: {user.username} ({timeframe})")
-    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
-    # Reduce the x-ticks to avoid overlap
-    ax.xaxis.set_major_locator(MaxNLocator(10))
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    fig.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
+    spec = chart_formats.image_spec(request, (9, 4))
+
+    series = chart_data.global_profit_series(user, timeframe)
+    if series is None:
+        return _placeholder_response(spec, "No transactions found for global chart")
+
+    # Plot on a date axis, at most one point per pixel and 10 x-ticks
+    series = chart_data.downsample(series, _max_points(request, charts.pixel_width(spec.figsize, spec.dpi)))
+    return charts.line_chart(
+        series.dates, [(series.columns['cumulative_profit'], 'blue', None)],
+        title=f"Global Realized Profit: {user.username} ({timeframe})",
+        xlabel='Date', ylabel='Cumulative Profit',
+        max_xticks=10, align_xticks='right',
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
+    )
 
 
 @login_required
+@cached_chart('item_price')
 def item_price_chart(request):
     """
     Plot buy/sell price lines for the requested item,
     grouping by (Daily/Monthly/Yearly). Now forward-fills missing days
     so lines remain continuous, and uses MaxNLocator to reduce date label clutter.
     """
-    import io
+    from . import chart_data, charts
     user = request.user
     search_query = request.GET.get('search', '').strip()
     timeframe = request.GET.get('timeframe', 'Daily')
+    spec = chart_formats.image_spec(request, (10, 4))
 
     if not search_query:
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, "No item specified", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
+        return _placeholder_response(spec, "No item specified")
 
     # Resolve item from short_name or full_name
-    alias = Alias.objects.filter(short_name__iexact=search_query).first()
-    if not alias:
-        alias = Alias.objects.filter(full_name__iexact=search_query).first()
-    if alias:
-        item_obj = Item.objects.filter(name__iexact=alias.full_name).first()
-    else:
-        item_obj = Item.objects.filter(name__iexact=search_query).first()
+    _, item_obj = resolver.resolve(search_query)
 
     if not item_obj:
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, f"Item '{search_query}' not found", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    qs = Transaction.objects.filter(user=user, item=item_obj).order_by('date_of_holding', 'id')
-    if not qs.exists():
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, f"No transactions for '{item_obj.name}'", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    # Build raw DataFrame
-    rows = []
-    for t in qs:
-        rows.append({
-            'trans_type': t.trans_type,
-            'price': t.price,
-            'quantity': t.quantity,
-            'date': t.date_of_holding
-        })
-    df = pd.DataFrame(rows)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
-
-    # If you want to resample daily, do it here so lines connect across missing days
-    if timeframe == 'Monthly':
-        df = df.resample('MS').apply({
-            'trans_type': 'last',
-            'price': 'mean',      # or maybe a last known?
-            'quantity': 'sum'     # or whatever grouping logic you need
-        })
-    elif timeframe == 'Yearly':
-        df = df.resample('YS').apply({
-            'trans_type': 'last',
-            'price': 'mean',
-            'quantity': 'sum'
-        })
-    else:
-        # daily
-        df = df.resample('D').apply({
-            'trans_type': 'last',
-            'price': 'mean',
-            'quantity': 'sum'
-        })
-
-    # Now we have 1 row per daily/monthly/yearly bucket.
-    # Next: separate buys vs sells within each group if needed.
-    # Weighted‐avg approach can be re-done with the original groupby code or you can keep it simpler.
-
-    # If you specifically want Weighted average buy/sell lines:
-    # (We re-run the group logic you had, then resample daily to forward-fill.)
-    # For brevity, let's do a simplified approach: just separate Buy vs Sell, forward-fill.
-
-    # We'll do the exact weighted average approach you had:
-    # 1) revert to the original df (unresampled)
-    df_orig = pd.DataFrame(rows)
-    df_orig['date'] = pd.to_datetime(df_orig['date'])
-    # group by the "timeframe" key
-    def date_key(d):
-        if timeframe == 'Monthly':
-            return (d.year, d.month)
-        elif timeframe == 'Yearly':
-            return d.year
-        else:
-            return d
-
-    df_orig['group_key'] = df_orig['date'].apply(date_key)
-
-    buy_df = df_orig[df_orig['trans_type'] == 'Buy'].groupby('group_key').apply(
-        lambda g: (g['price'] * g['quantity']).sum() / g['quantity'].sum()
-    ).rename('buy_price').reset_index()
-
-    sell_df = df_orig[df_orig['trans_type'] == 'Sell'].groupby('group_key').apply(
-        lambda g: (g['price'] * g['quantity']).sum() / g['quantity'].sum()
-    ).rename('sell_price').reset_index()
-
-    merged = pd.merge(buy_df, sell_df, on='group_key', how='outer')
-
-    # Convert group_key back to a real date. If daily, we can use it directly.
-    # If monthly or yearly, pick an arbitrary day in that month/year:
-    def key_to_date(k):
-        if isinstance(k, tuple):  # (year, month)
-            return pd.to_datetime(f"{k[0]}-{k[1]:02d}-01")
-        elif isinstance(k, int):  # year
-            return pd.to_datetime(f"{k}-01-01")
-        else:
-            return pd.to_datetime(k)  # daily is already a date
-
-    merged['date'] = merged['group_key'].apply(key_to_date)
-    merged.set_index('date', inplace=True)
-    # Replace 0 with NaN to avoid dropping to zero lines
-    merged['buy_price'] = merged['buy_price'].replace(0, pd.NA)
-    merged['sell_price'] = merged['sell_price'].replace(0, pd.NA)
-
-    # Resample daily so lines are continuous; forward-fill
-    # (If timeframe is monthly/yearly, you might prefer monthly steps, but daily ensures continuous lines).
-    merged = merged.resample('D').asfreq()
-    merged['buy_price'] = merged['buy_price'].ffill()
-    merged['sell_price'] = merged['sell_price'].ffill()
-
-    # Build a string x_label
-    merged['x_label'] = merged.index.strftime('%Y-%m-%d')
-
-    # Drop rows that are entirely NaN if you prefer, or keep them so lines remain connected.
-    # merged.dropna(how='all', subset=['buy_price','sell_price'], inplace=True)
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(merged['x_label'], merged['buy_price'], color='green', linewidth=1, marker='', label='Buy Price')
-    ax.plot(merged['x_label'], merged['sell_price'], color='red', linewidth=1, marker='', label='Sell Price')
-    ax.set_title(f"{item_obj.name} Price History ({timeframe})")
-    ax.set_ylabel("Price")
-    ax.legend()
-    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
-
-    # Limit x-axis labels
-    ax.xaxis.set_major_locator(MaxNLocator(10))
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    fig.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
+        return _placeholder_response(spec, f"Item '{search_query}' not found")
+
+    series = chart_data.item_price_series(user, item_obj, timeframe)
+    if series is None:
+        return _placeholder_response(spec, f"No transactions for '{item_obj.name}'")
+
+    # Plot on a date axis, at most one point per pixel, limiting the x-axis labels
+    series = chart_data.downsample(series, _max_points(request, charts.pixel_width(spec.figsize, spec.dpi)))
+    return charts.line_chart(
+        series.dates,
+        [(series.columns['buy_price'], 'green', 'Buy Price'), (series.columns['sell_price'], 'red', 'Sell Price')],
+        title=f"{item_obj.name} Price History ({timeframe})", ylabel="Price",
+        max_xticks=10, align_xticks='right', legend=True,
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
+    )
 
 
 @login_required
+@cached_chart('item_profit')
 def item_profit_chart(request):
     """
     Plot item-specific cumulative profit. Now uses MaxNLocator to reduce date labels,
     and still does the monthly/yearly grouping if requested.
     """
-    import io
+    from . import chart_data, charts
     user = request.user
     search_query = request.GET.get('search', '').strip()
     timeframe = request.GET.get('timeframe', 'Daily')
+    spec = chart_formats.image_spec(request, (10, 4))
 
     if not search_query:
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, "No item specified", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    alias = Alias.objects.filter(short_name__iexact=search_query).first()
-    if not alias:
-        alias = Alias.objects.filter(full_name__iexact=search_query).first()
-    if alias:
-        item_obj = Item.objects.filter(name__iexact=alias.full_name).first()
-    else:
-        item_obj = Item.objects.filter(name__iexact=search_query).first()
+        return _placeholder_response(spec, "No item specified")
+
+    _, item_obj = resolver.resolve(search_query)
 
     if not item_obj:
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, f"Item '{search_query}' not found", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    qs = Transaction.objects.filter(user=user, item=item_obj).order_by('date_of_holding', 'id')
-    if not qs.exists():
-        fig, ax = plt.subplots()
-        ax.text(0.5, 0.5, f"No transactions for '{item_obj.name}'", ha='center', va='center')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close(fig)
-        buf.seek(0)
-        return HttpResponse(buf.getvalue(), content_type='image/png')
-
-    # Build DataFrame
-    rows = []
-    for t in qs:
-        rows.append({
-            'date': t.date_of_holding,
-            'realised_profit': t.realised_profit
-        })
-    df = pd.DataFrame(rows)
-    df['date'] = pd.to_datetime(df['date'])
-
-    # Group by timeframe (Daily/Monthly/Yearly) and sum realized profits in each bucket
-    def date_key(d):
-        if timeframe == 'Monthly':
-            return (d.year, d.month)
-        elif timeframe == 'Yearly':
-            return d.year
-        else:
-            return d
-
-    df['group_key'] = df['date'].apply(date_key)
-    gp = df.groupby('group_key')['realised_profit'].sum().reset_index()
-    gp.rename(columns={'realised_profit': 'bucket_profit'}, inplace=True)
-
-    # Convert group_key back to a date/time index so we can resample or plot easily
-    def key_to_date(k):
-        if isinstance(k, tuple):
-            return pd.to_datetime(f"{k[0]}-{k[1]:02d}-01")
-        elif isinstance(k, int):
-            return pd.to_datetime(f"{k}-01-01")
-        else:
-            return pd.to_datetime(k)
-
-    gp['date'] = gp['group_key'].apply(key_to_date)
-    gp.sort_values('date', inplace=True)
-    gp.set_index('date', inplace=True)
-
-    # Now compute cumulative sum
-    gp['cumulative_profit'] = gp['bucket_profit'].cumsum()
-
-    # Forward-fill daily if timeframe == Daily. If monthly or yearly,
-    # you can do something similar or just plot as-is:
-    if timeframe == 'Daily':
-        # Reindex to daily range
-        all_days = pd.date_range(gp.index.min(), gp.index.max(), freq='D')
-        gp = gp.reindex(all_days)
-        gp['cumulative_profit'] = gp['cumulative_profit'].ffill()
-
-    # Build string x_label
-    if timeframe == 'Monthly':
-        gp['x_label'] = gp.index.strftime('%Y-%m')
-    elif timeframe == 'Yearly':
-        gp['x_label'] = gp.index.strftime('%Y')
-    else:
-        gp['x_label'] = gp.index.strftime('%Y-%m-%d')
+        return _placeholder_response(spec, f"Item '{search_query}' not found")
+
+    series = chart_data.item_profit_series(user, item_obj, timeframe)
+    if series is None:
+        return _placeholder_response(spec, f"No transactions for '{item_obj.name}'")
+
+    # Plot on a date axis, at most one point per pixel, limiting the x-axis ticks
+    series = chart_data.downsample(series, _max_points(request, charts.pixel_width(spec.figsize, spec.dpi)))
+    return charts.line_chart(
+        series.dates, [(series.columns['cumulative_profit'], 'blue', 'Cumulative Profit')],
+        title=f"{item_obj.name} - Cumulative Profit ({timeframe})",
+        xlabel="Date", ylabel="Profit",
+        max_xticks=10, align_xticks='right', legend=True,
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
+    )
+
+
+@login_required
+@cached_chart('item_dashboard')
+def item_dashboard_chart(request):
+    """
+    The item price and item profit charts as two panels of one image, from a
+    single read of the item's rollups (what the index page embeds for a search).
+    """
+    from . import chart_data, charts
+    search_query = request.GET.get('search', '').strip()
+    timeframe = request.GET.get('timeframe', 'Daily')
+    spec = chart_formats.image_spec(request, (10, 7))
+
+    if not search_query:
+        return _placeholder_response(spec, "No item specified")
 
-    # Plot
-    fig, ax = plt.subplots(figsize=(10,4))
-    ax.plot(
-        gp['x_label'], gp['cumulative_profit'],
-        color='blue', linewidth=1, marker='', label='Cumulative Profit'
+    _, item_obj = resolver.resolve(search_query)
+
+    if not item_obj:
+        return _placeholder_response(spec, f"Item '{search_query}' not found")
+
+    series = chart_data.item_dashboard_series(request.user, item_obj, timeframe)
+    if series is None:
+        return _placeholder_response(spec, f"No transactions for '{item_obj.name}'")
+
+    series = chart_data.downsample(series, _max_points(request, charts.pixel_width(spec.figsize, spec.dpi)))
+    columns = series.columns
+    return charts.stacked_chart(
+        series.dates,
+        [
+            ([(columns['buy_price'], 'green', 'Buy Price'), (columns['sell_price'], 'red', 'Sell Price')],
+             f"{item_obj.name} Price History ({timeframe})", "Price"),
+            ([(columns['cumulative_profit'], 'blue', 'Cumulative Profit')],
+             f"{item_obj.name} - Cumulative Profit ({timeframe})", "Profit"),
+        ],
+        max_xticks=10,
+        figsize=spec.figsize, dpi=spec.dpi, fmt=spec.format, out=_image_response(spec),
     )
-    ax.set_title(f"{item_obj.name} - Cumulative Profit ({timeframe})")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Profit")
-    ax.legend()
-    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
-
-    # Limit x-axis ticks
-    ax.xaxis.set_major_locator(MaxNLocator(10))
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-
-    fig.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
 
+
+# ----------------------------------------------------------------------------
+# JSON TIME SERIES FOR CLIENT-SIDE CHARTS (same data as the PNG charts above)
+# ----------------------------------------------------------------------------
+def _series_response(request, series, **extra):
+    """JSON of ``series``, reduced with LTTB if the request asks for ?max_points=."""
+    from . import chart_data
+    series = chart_data.downsample(series, _max_points(request))
+    return JsonResponse(dict(chart_data.to_json(series), **extra))
+
+
+def _item_for_series(request):
+    """(item, None) for the request's ?search=, or (None, error response)."""
+    search_query = request.GET.get('search', '').strip()
+    if not search_query:
+        return None, JsonResponse({'error': "No item specified"}, status=400)
+    _, item_obj = resolver.resolve(search_query)
+    if not item_obj:
+        return None, JsonResponse({'error': f"Item '{search_query}' not found"}, status=404)
+    return item_obj, None
+
+
+@login_required
+@gzip_page
+def global_profit_data(request):
+    """Columnar JSON of global_profit_chart's series."""
+    from . import chart_data
+    timeframe = request.GET.get('timeframe', 'Daily')
+    return _series_response(request, chart_data.global_profit_series(request.user, timeframe), timeframe=timeframe)
+
+
+@login_required
+@gzip_page
+def item_price_data(request):
+    """Columnar JSON of item_price_chart's buy/sell price series."""
+    from . import chart_data
+    item_obj, error = _item_for_series(request)
+    if error:
+        return error
+    timeframe = request.GET.get('timeframe', 'Daily')
+    series = chart_data.item_price_series(request.user, item_obj, timeframe)
+    return _series_response(request, series, item=item_obj.name, timeframe=timeframe)
+
+
+@login_required
+@gzip_page
+def item_profit_data(request):
+    """Columnar JSON of item_profit_chart's cumulative profit series."""
+    from . import chart_data
+    item_obj, error = _item_for_series(request)
+    if error:
+        return error
+    timeframe = request.GET.get('timeframe', 'Daily')
+    series = chart_data.item_profit_series(request.user, item_obj, timeframe)
+    return _series_response(request, series, item=item_obj.name, timeframe=timeframe)
+
+
+@login_required
+@gzip_page
+def item_dashboard_data(request):
+    """Columnar JSON of item_dashboard_chart's price and profit series, in one payload."""
+    from . import chart_data
+    item_obj, error = _item_for_series(request)
+    if error:
+        return error
+    timeframe = request.GET.get('timeframe', 'Daily')
+    series = chart_data.item_dashboard_series(request.user, item_obj, timeframe)
+    return _series_response(request, series, item=item_obj.name, timeframe=timeframe)
+
+
+@login_required
+@gzip_page
+def wealth_data_series(request):
+    """Columnar JSON of wealth_chart_all_years' monthly totals."""
+    from . import chart_data
+    return _series_response(request, chart_data.wealth_series(request.user.username))
+
+
+@login_required
+@gzip_page
+def wealth_analytics_data(request):
+    """
+    Columnar JSON of the wealth analytics: monthly totals with their change,
+    growth and drawdown columns, plus the year-over-year table and summary.
+    """
+    from . import wealth_analytics
+    analytics = wealth_analytics.analyse(request.user.username)
+    if analytics is None:
+        return _series_response(request, None, yoy={}, summary=None)
+    return _series_response(request, analytics.series, yoy=analytics.yoy, summary=analytics.summary)
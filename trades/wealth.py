@@ -0,0 +1,82 @@
+# trades/wealth.py
+
+"""
+Numeric wealth storage: WealthPoint rows mirroring the text month fields of
+WealthData, and the totals computed from them.
+
+WealthData keeps the values as typed (the forms and the CSV import are
+unchanged); saving a row re-parses its twelve months into WealthPoints once,
+so totals are a single GROUP BY instead of parsing every record on every
+page.  QuerySet.update() and bulk_create() on WealthData send no signals:
+call sync_points() or rebuild_points() after them.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import WealthData, WealthPoint
+
+MONTH_FIELDS = ['january', 'february', 'march', 'april', 'may', 'june',
+                'july', 'august', 'september', 'october', 'november', 'december']
+
+CENT = Decimal('0.01')
+# WealthPoint.value holds 18 digits before the decimal point.
+LIMIT = Decimal(10) ** 18
+
+
+def parse_value(text):
+    """A month field as a Decimal (thousands separators allowed), or None if blank or not a number."""
+    try:
+        value = Decimal((text or '').replace(',', '').strip())
+    except InvalidOperation:
+        return None
+    return value.quantize(CENT) if value.is_finite() and abs(value) < LIMIT else None
+
+
+def points_for(record):
+    """Unsaved WealthPoints for ``record``'s non-blank months."""
+    points = []
+    for month, field in enumerate(MONTH_FIELDS, start=1):
+        value = parse_value(getattr(record, field))
+        if value is not None:
+            points.append(WealthPoint(wealth_data_id=record.pk, account_name=record.account_name,
+                                      year=record.year, month=month, value=value))
+    return points
+
+
+def sync_points(record):
+    """Replace ``record``'s WealthPoints with freshly parsed ones."""
+    with transaction.atomic():
+        WealthPoint.objects.filter(wealth_data_id=record.pk).delete()
+        WealthPoint.objects.bulk_create(points_for(record))
+
+
+def rebuild_points(batch_size=1000):
+    """Re-parse every WealthData row.  Returns the number of points written."""
+    with transaction.atomic():
+        WealthPoint.objects.all().delete()
+        points = [point for record in WealthData.objects.iterator() for point in points_for(record)]
+        return len(WealthPoint.objects.bulk_create(points, batch_size=batch_size))
+
+
+def monthly_totals(account_name, year=None):
+    """
+    {(year, month): total} of ``account_name``'s wealth, summed over its rows
+    in one grouped query, optionally for one ``year`` only.  Months without
+    any value are absent.
+    """
+    points = WealthPoint.objects.filter(account_name=account_name)
+    if year is not None:
+        points = points.filter(year=year)
+    rows = points.order_by().values_list('year', 'month').annotate(total=Sum('value'))
+    return {(row_year, month): total for row_year, month, total in rows}
+
+
+@receiver(post_save, sender=WealthData)
+def _wealth_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_points(instance)
@@ -0,0 +1,140 @@
+# trades/wealth_analytics.py
+
+"""
+Wealth analytics: month-over-month change, rolling 3 and 12-month growth,
+drawdown from the running peak and a year-over-year comparison.
+
+A user's wealth is read with one grouped query into a years x 12 matrix of
+monthly totals (summed in SQL: loading every WealthPoint row was slower than
+the old string parsing), and every figure is an array operation over it.  As
+on the wealth chart, months that total zero count as unrecorded (NaN), so
+changes are only computed between recorded months and come out as null
+otherwise.
+
+Growth and drawdown are fractions (0.05 is 5%), against positive totals only.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from django.db.models import FloatField, Sum
+from django.db.models.functions import Cast
+
+from .chart_data import Series
+from .models import WealthPoint
+from .wealth import MONTH_FIELDS
+
+# Months spanned by the rolling growth columns.
+GROWTH_WINDOWS = (3, 12)
+
+# series: Series of the monthly totals and the columns derived from them.
+# yoy: {year: [change on the same month a year before, January first]}.
+# summary: the latest month's figures and the largest drawdown.
+Analytics = namedtuple('Analytics', ['series', 'yoy', 'summary'])
+
+
+def wealth_matrix(account_name):
+    """
+    (first year, matrix) of ``account_name``'s monthly wealth totals: one row
+    per year from the first recorded year to the last, one column per month,
+    NaN for months without a non-zero total.  None without any value.
+    """
+    rows = list(WealthPoint.objects.filter(account_name=account_name).order_by()
+                .values_list('year', 'month').annotate(total=Cast(Sum('value'), FloatField())))
+    if not rows:
+        return None
+    years, months, totals = (np.array(column) for column in zip(*rows))
+    first = int(years.min())
+    matrix = np.full((int(years.max()) - first + 1, 12), np.nan)
+    matrix[years - first, months - 1] = totals
+    matrix[matrix == 0] = np.nan
+    return first, matrix
+
+
+def _shifted(values, months):
+    """``values`` moved ``months`` later, NaN-padded at the start."""
+    shifted = np.full_like(values, np.nan)
+    shifted[months:] = values[:-months]
+    return shifted
+
+
+def _growth(values, base):
+    """values / base - 1 where base is positive, else NaN."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base > 0, values / base - 1, np.nan)
+
+
+def _value(number):
+    return None if np.isnan(number) else float(number)
+
+
+def _max_drawdown(dates, totals, drawdown):
+    """{'max_drawdown', 'peak', 'trough'}, the dates as 'YYYY-MM'; None values without a decline."""
+    if np.isnan(drawdown).all():
+        return {'max_drawdown': None, 'peak': None, 'trough': None}
+    trough = int(np.nanargmin(drawdown))
+    if drawdown[trough] == 0:
+        return {'max_drawdown': 0.0, 'peak': None, 'trough': None}
+    peak = int(np.nanargmax(totals[:trough + 1]))
+    return {
+        'max_drawdown': float(drawdown[trough]),
+        'peak': dates[peak].strftime('%Y-%m'),
+        'trough': dates[trough].strftime('%Y-%m'),
+    }
+
+
+def analyse(account_name):
+    """Analytics of ``account_name``'s wealth, or None without any value."""
+    loaded = wealth_matrix(account_name)
+    if loaded is None:
+        return None
+    first_year, matrix = loaded
+    # Year-over-year: differenced down the years of the matrix.
+    changes = np.vstack([np.full((1, 12), np.nan), np.diff(matrix, axis=0)])
+    yoy = {first_year + i: [_value(change) for change in year] for i, year in enumerate(changes)}
+
+    # The monthly series runs from the first recorded month to the last.
+    recorded = np.flatnonzero(~np.isnan(matrix.ravel()))
+    if not len(recorded):
+        return None
+    totals = matrix.ravel()[recorded[0]:recorded[-1] + 1]
+    dates = pd.date_range(f'{first_year + recorded[0] // 12}-{recorded[0] % 12 + 1:02d}-01',
+                          periods=len(totals), freq='MS')
+
+    previous = _shifted(totals, 1)
+    columns = {
+        'total_wealth': totals,
+        'change': totals - previous,
+        'change_pct': _growth(totals, previous),
+    }
+    for months in GROWTH_WINDOWS:
+        columns[f'growth_{months}m'] = _growth(totals, _shifted(totals, months))
+    # The running peak skips unrecorded months (fmax ignores NaN).
+    columns['drawdown'] = _growth(totals, np.fmax.accumulate(totals))
+
+    latest = len(totals) - 1
+    summary = {
+        'month': dates[latest].strftime('%Y-%m'),
+        'total_wealth': _value(totals[latest]),
+        'change': _value(columns['change'][latest]),
+        **{f'growth_{months}m': _value(columns[f'growth_{months}m'][latest]) for months in GROWTH_WINDOWS},
+        **_max_drawdown(dates, totals, columns['drawdown']),
+    }
+    return Analytics(Series(dates, columns), yoy, summary)
+
+
+def year_changes(analytics, year):
+    """
+    ({month field: change from the month before}, {month field: change from
+    a year before}) for ``year``, as on the wealth list; None where unknown.
+    """
+    mom = {field: None for field in MONTH_FIELDS}
+    if analytics is None:
+        return mom, dict(mom)
+    dates, changes = analytics.series.dates, analytics.series.columns['change']
+    for position in np.flatnonzero(dates.year == year):
+        mom[MONTH_FIELDS[dates[position].month - 1]] = _value(changes[position])
+    yoy = dict(zip(MONTH_FIELDS, analytics.yoy.get(year, [None] * 12)))
+    return mom, yoy